@@ -0,0 +1,143 @@
+import math
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Cross-watchlist report metrics computed on aligned (time x symbol) matrices in
+# one NumPy pass: returns, intraday range, volatility, moving averages, drawdown
+# and a movers ranking. Input comes from the local price store, so adding a
+# metric costs no network calls.
+
+VOL_WINDOW = 20
+MA_WINDOWS = (5, 20)
+TRADING_DAYS = 252
+
+
+def aligned_matrices(store, symbols, interval="1d", start=None, fields=("close", "high", "low")):
+    symbols = list(symbols)
+    series = {f: {} for f in fields}
+    for symbol in symbols:
+        bars = store.range(symbol, interval, start)
+        if not len(bars):
+            continue
+        for f in fields:
+            series[f][symbol] = pd.Series(bars[f], index=bars["ts"])
+    matrices = {}
+    index = None
+    for f in fields:
+        frame = pd.DataFrame(series[f]).reindex(columns=symbols).sort_index()
+        if index is not None:
+            frame = frame.reindex(index)
+        index = frame.index
+        matrices[f] = frame.to_numpy(dtype="f8")
+    return np.asarray(index, dtype="i8"), symbols, matrices
+
+
+def _fill_index(a):
+    # Row index of the last valid value at or above each cell (0 where none yet)
+    rows = np.arange(a.shape[0])[:, None]
+    idx = np.where(~np.isnan(a), rows, 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return idx
+
+
+def compute_metrics(close, high=None, low=None, vol_window=VOL_WINDOW, ma_windows=MA_WINDOWS):
+    n_rows, n_cols = close.shape
+    nan = np.full(n_cols, np.nan)
+    if n_rows == 0:
+        return {"last": nan, "change": nan, "return": nan, "period_return": nan, "range": nan,
+                "volatility": nan, "drawdown": nan, "max_drawdown": nan,
+                **{f"ma{w}": nan for w in ma_windows}}
+    cols = np.arange(n_cols)
+    idx = _fill_index(close)
+    filled = close[idx, cols]
+
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        # Last two valid closes per symbol (exchanges have different holidays)
+        last_row = idx[-1]
+        prev_row = idx[np.maximum(last_row - 1, 0), cols]
+        last = close[last_row, cols]
+        prev = np.where(last_row > 0, close[prev_row, cols], np.nan)
+        change = last - prev
+        ret = change / prev
+
+        first_row = np.argmax(~np.isnan(close), axis=0)
+        period_return = last / close[first_row, cols] - 1
+
+        log_ret = np.diff(np.log(filled), axis=0)
+        volatility = np.nanstd(log_ret[-vol_window:], axis=0, ddof=1) * math.sqrt(TRADING_DAYS)
+
+        peak = np.fmax.accumulate(filled, axis=0)
+        dd = filled / peak - 1
+        drawdown = dd[-1]
+        max_drawdown = np.nanmin(dd, axis=0)
+
+        day_range = nan
+        if high is not None and low is not None:
+            day_range = (high[last_row, cols] - low[last_row, cols]) / last
+
+        metrics = {
+            "last": last,
+            "change": change,
+            "return": ret,
+            "period_return": period_return,
+            "range": day_range,
+            "volatility": volatility,
+            "drawdown": drawdown,
+            "max_drawdown": max_drawdown,
+        }
+        for w in ma_windows:
+            metrics[f"ma{w}"] = np.nanmean(filled[-w:], axis=0)
+    return metrics
+
+
+def movers(symbols, values, k=3):
+    # (top, bottom) lists of (symbol, value), NaNs ignored
+    values = np.asarray(values, dtype="f8")
+    valid = np.flatnonzero(~np.isnan(values))
+    order = valid[np.argsort(values[valid])]
+    top = [(symbols[i], values[i]) for i in order[::-1][:k]]
+    bottom = [(symbols[i], values[i]) for i in order[:k]]
+    return top, bottom
+
+
+def watchlist_metrics(store, symbols, days=60, interval="1d", now=None):
+    start = None
+    if now is not None or days:
+        start = int((now or pd.Timestamp.now(tz="UTC").timestamp()) - days * 86400)
+    _, symbols, m = aligned_matrices(store, symbols, interval, start)
+    return symbols, compute_metrics(m["close"], m["high"], m["low"])
+
+
+def change_lines(symbols, metrics, currency="EUR"):
+    lines = []
+    for i, symbol in enumerate(symbols):
+        if np.isnan(metrics["return"][i]):
+            lines.append(f"{symbol}: No price data available.")
+            continue
+        lines.append(
+            f"{symbol}: {metrics['last'][i]:.2f} {currency} ({metrics['change'][i]:+.2f}, {metrics['return'][i] * 100:+.2f}%)"
+        )
+    return lines
+
+
+def metrics_lines(symbols, metrics):
+    lines = []
+    for i, symbol in enumerate(symbols):
+        if np.isnan(metrics["last"][i]):
+            continue
+        lines.append(
+            f"{symbol}: range {metrics['range'][i] * 100:.2f}% | vol {metrics['volatility'][i] * 100:.1f}% | "
+            f"MA5 {metrics['ma5'][i]:.2f} | MA20 {metrics['ma20'][i]:.2f} | DD {metrics['drawdown'][i] * 100:+.1f}%"
+        )
+    return lines
+
+
+def movers_text(symbols, values, k=3, label="Movers"):
+    top, bottom = movers(symbols, values, k)
+    if not top:
+        return ""
+    fmt = lambda items: ", ".join(f"{s} {v * 100:+.2f}%" for s, v in items)
+    return f"🚀 Top {label}: {fmt(top)}\n📉 Flop {label}: {fmt(bottom)}"
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from hashlib import sha1
+from datetime import datetime, timezone
+
+# Per-day store of fetched news articles (title, link, source, pubDate, symbol),
+# filled through a TTL-bounded fetch cache. /news, periodic_news, daily_news and
+# the reports all read from here instead of hitting the news API themselves.
+# refresh() buffers new lines in memory and appends them in one pass off the loop.
+
+ARTICLE_STORE_DIR = os.getenv("ARTICLE_STORE_DIR", os.path.join(os.getenv("STOCK_BOT_DIR", "/opt/stock-bot"), "news"))
+NEWS_FETCH_TTL = int(os.getenv("NEWS_FETCH_TTL", "900"))  # seconds
+ARTICLE_STORE_DAYS = int(os.getenv("ARTICLE_STORE_DAYS", "7"))  # days kept in memory
+
+
+def article_id(title, url):
+    return sha1(f"{title}{url}".encode()).hexdigest()
+
+
+def today_str():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def normalize_article(symbol, item):
+    title = item.get("title")
+    link = item.get("link")
+    pub_date = item.get("pubDate")  # ISO 8601 z.B. 2025-06-14T08:33:00Z
+    if not (title and link and pub_date):
+        return None
+    try:
+        pub_dt = datetime.fromisoformat(pub_date.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if pub_dt.tzinfo is None:
+        pub_dt = pub_dt.replace(tzinfo=timezone.utc)
+    return {
+        "id": article_id(title, link),
+        "symbol": symbol,
+        "symbols": [symbol],
+        "title": title,
+        "link": link,
+        "source": item.get("source_id") or "Newsdata",
+        "pubDate": pub_dt.astimezone(timezone.utc).isoformat(),
+        "date": pub_dt.astimezone(timezone.utc).strftime("%Y-%m-%d"),
+    }
+
+
+class ArticleStore:
+    def __init__(self, directory=ARTICLE_STORE_DIR, ttl=NEWS_FETCH_TTL, keep_days=ARTICLE_STORE_DAYS, io=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.keep_days = keep_days
+        self.io = io  # coroutine runner for file writes (e.g. Offload.io); defaults to the loop's executor
+        self._days = {}  # date -> {id: article}
+        self._fetched = {}  # symbol -> last fetch timestamp
+        self._pending = []  # lines added but not yet written, in order
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # keeps flushes in order without blocking add()
+        self._refresh_lock = None
+        self.stats = {"fetches": 0, "cache_hits": 0}
+
+    def _path(self, date_str):
+        return os.path.join(self.directory, f"{date_str}.jsonl")
+
+    def _day_locked(self, date_str):
+        day = self._days.get(date_str)
+        if day is not None:
+            return day
+        day = {}
+        path = self._path(date_str)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        article = json.loads(line)
+                        day[article["id"]] = article
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        self._days[date_str] = day
+        for old in sorted(self._days)[:-self.keep_days]:
+            del self._days[old]
+        return day
+
+    def flush(self):
+        # Appends everything added since the last flush, one open per day file
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            by_date = {}
+            for line in pending:
+                by_date.setdefault(line[0], []).append(line[1])
+            os.makedirs(self.directory, exist_ok=True)
+            for date_str, lines in by_date.items():
+                with open(self._path(date_str), "a", encoding="utf-8") as f:
+                    f.write("".join(lines))
+            return len(pending)
+
+    def _queue_locked(self, article):
+        # Serialized now, so later in-memory changes don't leak into this line
+        self._pending.append((article["date"], json.dumps(article, ensure_ascii=False) + "\n"))
+
+    def add(self, symbol, item, flush=True):
+        # flush=False only buffers the line until flush()
+        article = normalize_article(symbol, item)
+        if article is None:
+            return None
+        with self._lock:
+            day = self._day_locked(article["date"])
+            existing = day.get(article["id"])
+            if existing is not None:
+                if symbol not in existing["symbols"]:
+                    existing["symbols"].append(symbol)
+                    # Later lines win on load
+                    self._queue_locked(existing)
+                article = existing
+            else:
+                day[article["id"]] = article
+                self._queue_locked(article)
+        if flush:
+            self.flush()
+        return article
+
+    def articles(self, date_str=None, symbols=None):
+        date_str = date_str or today_str()
+        wanted = {s.upper() for s in symbols} if symbols is not None else None
+        with self._lock:
+            items = list(self._day_locked(date_str).values())
+        if wanted is not None:
+            items = [a for a in items if wanted.intersection(a["symbols"])]
+        return sorted(items, key=lambda a: a["pubDate"], reverse=True)
+
+    def by_symbol(self, date_str=None, symbols=None):
+        grouped = {}
+        for article in self.articles(date_str, symbols):
+            for symbol in article["symbols"]:
+                if symbols is None or symbol in symbols:
+                    grouped.setdefault(symbol, []).append(article)
+        return grouped
+
+    def report_text(self, date_str=None):
+        lines = []
+        for article in self.articles(date_str):
+            lines.append(
+                f"{', '.join(article['symbols'])}: {article['title']} ({article['source']}, {article['pubDate'][11:16]} UTC) {article['link']}"
+            )
+        return "\n".join(lines)
+
+    def stale_symbols(self, symbols, now=None):
+        now = now or time.time()
+        return [s for s in symbols if now - self._fetched.get(s, 0) >= self.ttl]
+
+    async def refresh(self, symbols, fetcher, force=False):
+        # Concurrent callers wait for the running refresh instead of fetching again
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        symbols = list(symbols)
+        async with self._refresh_lock:
+            todo = symbols if force else self.stale_symbols(symbols)
+            self.stats["cache_hits"] += len(symbols) - len(todo)
+            if not todo:
+                return 0
+            added = 0
+            try:
+                async for symbol, items in fetcher.iter_symbols(todo):
+                    if items is None:
+                        continue  # Fetch failed: stays stale so the next refresh retries it
+                    for item in items:
+                        if self.add(symbol, item, flush=False) is not None:
+                            added += 1
+                    self._fetched[symbol] = time.time()
+            finally:
+                await self._io(self.flush)
+            self.stats["fetches"] += len(todo)
+            return added
+
+    async def _io(self, fn, *args):
+        if self.io is not None:
+            return await self.io(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
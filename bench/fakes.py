@@ -0,0 +1,301 @@
+import re
+import time
+import zlib
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+
+# Local stand-ins for everything the pipelines talk to: an HTTP stub serving the
+# Newsdata and OpenAI chat-completions APIs, a yfinance replacement that generates
+# deterministic OHLCV, and Discord channel/interaction objects that only record
+# what was sent. All of them count calls so runs can be compared by upstream usage.
+
+ARTICLES_PER_TERM = 2
+MAX_TERMS = 10
+INTRADAY_BARS = 26  # 15m bars in a 6.5h session
+SESSION_OPEN = timedelta(hours=13, minutes=30)  # UTC
+QUOTE_TYPES = {"EF": "ETF", "CR": "CRYPTOCURRENCY"}
+
+
+def watchlist(size):
+    # {symbol: type} with roughly 80% stocks, 10% ETFs, 10% crypto
+    stocks = {}
+    for i in range(size):
+        if i % 10 == 5:
+            stocks[f"EF{i:04d}"] = "ETF"
+        elif i % 10 == 9:
+            stocks[f"CR{i:04d}-USD"] = "Crypto"
+        else:
+            stocks[f"BN{i:04d}"] = "Stock"
+    return stocks
+
+
+def _seed(symbol):
+    return zlib.crc32(symbol.encode()) % 10_000
+
+
+def _business_days(start, end):
+    return pd.bdate_range(start.normalize(), end.normalize())
+
+
+def _period_days(period):
+    unit = period[-2:] if period.endswith("mo") else period[-1]
+    count = int(period[:-len(unit)])
+    return count * {"d": 1, "wk": 7, "mo": 30, "y": 365}.get(unit, 1)
+
+
+class FakeYFinance:
+    # Drop-in for yf.download, yf.Ticker(...).info and YfData().get_raw_json (v7 quote)
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = {"download": 0, "download_symbols": 0, "info": 0, "quote": 0, "quote_symbols": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, **counts):
+        with self._lock:
+            for key, n in counts.items():
+                self.calls[key] += n
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _index(self, period, start, interval):
+        now = pd.Timestamp.now(tz="UTC")
+        if start is not None:
+            start = pd.Timestamp(start, tz="UTC") if not isinstance(start, (int, float)) else pd.Timestamp(start, unit="s", tz="UTC")
+            days = _business_days(start, now)
+        else:
+            days = _business_days(now - pd.Timedelta(days=_period_days(period or "1mo") + 7), now)
+            days = days[-_period_days(period or "1mo"):] if interval == "1d" else days[-max(1, _period_days(period or "1d")):]
+        if interval == "1d":
+            return pd.DatetimeIndex(days.tz_localize(None))
+        step = pd.Timedelta(interval.replace("m", "min"))
+        days = days.tz_convert("UTC") if days.tz is not None else days.tz_localize("UTC")
+        stamps = [day + SESSION_OPEN + step * i for day in days for i in range(INTRADAY_BARS)]
+        return pd.DatetimeIndex([ts for ts in stamps if ts <= now] or stamps[:INTRADAY_BARS])
+
+    def bars(self, symbol, index):
+        # Smooth wave plus hash noise, a function of (symbol, timestamp) only, so
+        # overlapping downloads agree bar for bar
+        seed = _seed(symbol)
+        ts = (index.asi8 // 10**9).astype(np.int64)
+        base = 20 + seed % 480
+        noise = ((ts * 2654435761 + seed) % 1000) / 1000 - 0.5
+        close = base * (1 + 0.05 * np.sin(ts / 86400 / 3 + seed) + 0.01 * noise)
+        return pd.DataFrame({
+            "Open": close * (1 - 0.002 * noise),
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+            "Volume": (1_000_000 + seed * 100 + (ts % 997) * 10).astype(np.int64),
+        }, index=index)
+
+    def download(self, tickers, period=None, start=None, interval="1d", group_by="column", **kwargs):
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        self._count(download=1, download_symbols=len(symbols))
+        index = self._index(period, start, interval)
+        frames = {symbol: self.bars(symbol, index) for symbol in symbols}
+        return pd.concat(frames, axis=1)
+
+    def meta(self, symbol):
+        quote_type = QUOTE_TYPES.get(symbol[:2], "EQUITY")
+        return {
+            "symbol": symbol,
+            "shortName": f"{symbol.split('-')[0]} Bench {'Coin' if quote_type == 'CRYPTOCURRENCY' else 'Corp'}",
+            "quoteType": quote_type,
+            "exchange": "CCC" if quote_type == "CRYPTOCURRENCY" else "NMS",
+            "currency": "USD",
+        }
+
+    def Ticker(self, symbol):
+        outer = self
+
+        class _Ticker:
+            @property
+            def info(self):
+                outer._count(info=1)
+                return outer.meta(symbol.upper())
+
+        return _Ticker()
+
+    def YfData(self, *args, **kwargs):
+        outer = self
+
+        class _YfData:
+            def get_raw_json(self, url, params=None, **kw):
+                symbols = [s for s in (params or {}).get("symbols", "").split(",") if s]
+                outer._count(quote=1, quote_symbols=len(symbols))
+                return {"quoteResponse": {"result": [outer.meta(s.upper()) for s in symbols]}}
+
+        return _YfData()
+
+    def install(self):
+        import yfinance
+        import yfinance.data
+
+        yfinance.download = self.download
+        yfinance.Ticker = self.Ticker
+        yfinance.data.YfData = self.YfData
+
+
+class UpstreamStub:
+    # Newsdata (/api/1/news) and OpenAI (/v1/chat/completions) on one local port,
+    # served from its own thread so a blocked bot loop does not slow the stub down
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.calls = {"newsdata": 0, "newsdata_articles": 0, "openai": 0, "openai_prompt_chars": 0}
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def _news(self, request):
+        self.calls["newsdata"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        query = request.query.get("q", "")
+        terms = re.findall(r'"([^"]+)"', query) or [t for t in re.split(r"\s+OR\s+", query) if t]
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        results = []
+        for term in terms[:MAX_TERMS]:
+            for i in range(ARTICLES_PER_TERM):
+                slug = re.sub(r"\W+", "-", term.lower())
+                results.append({
+                    "title": f"{term} shares move after bench update {i + 1}",
+                    "link": f"https://news.bench.local/{slug}/{zlib.crc32(query.encode())}-{i}",
+                    "source_id": "bench",
+                    "pubDate": now,
+                })
+        self.calls["newsdata_articles"] += len(results)
+        return web.json_response({"status": "success", "totalResults": len(results), "results": results})
+
+    async def _chat(self, request):
+        self.calls["openai"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        body = await request.json()
+        prompt = "\n".join(m.get("content") or "" for m in body.get("messages", []))
+        self.calls["openai_prompt_chars"] += len(prompt)
+        lines = [line for line in prompt.splitlines() if line.strip()][1:6]
+        content = "Bench summary:\n" + "\n".join(f"- {line[:80]}" for line in lines)
+        return web.json_response({
+            "id": f"chatcmpl-bench-{self.calls['openai']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "bench"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        })
+
+    async def _serve(self):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_get("/api/1/news", self._news)
+        app.router.add_post("/v1/chat/completions", self._chat)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+
+    def start(self):
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._serve())
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="bench-upstream", daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(10)
+
+
+class _Sent:
+    # Records one outgoing message; attached files are read (like discord.py does) and closed
+    def __init__(self, content=None, file=None, files=None, embed=None, embeds=None):
+        self.content = content
+        self.files = []
+        for f in ([file] if file else []) + list(files or []):
+            data = f.fp.read()
+            self.files.append((f.filename, len(data)))
+            f.close()
+        self.embeds = len(embeds or []) + (1 if embed else 0)
+        self.id = id(self)
+
+    async def edit(self, content=None, **kwargs):
+        self.content = content
+
+
+class FakeChannel:
+    def __init__(self, channel_id=1):
+        self.id = channel_id
+        self.sent = []
+
+    async def send(self, content=None, *, file=None, files=None, embed=None, embeds=None, **kwargs):
+        message = _Sent(content, file, files, embed, embeds)
+        self.sent.append(message)
+        return message
+
+
+class _Response:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+        await self._interaction.channel.send(content, **kwargs)
+
+
+class _Followup:
+    def __init__(self, channel):
+        self._channel = channel
+
+    async def send(self, content=None, *, wait=False, **kwargs):
+        return await self._channel.send(content, **kwargs)
+
+
+class FakeInteraction:
+    def __init__(self, channel=None, interaction_id=1):
+        self.id = interaction_id
+        self.channel = channel or FakeChannel()
+        self.channel_id = self.channel.id
+        self.command = None
+        self.extras = {}
+        self.response = _Response(self)
+        self.followup = _Followup(self.channel)
+
+    async def original_response(self):
+        return _Sent("original")
+
+
+def message_stats(channel):
+    return {
+        "messages": len(channel.sent),
+        "files": sum(len(m.files) for m in channel.sent),
+        "file_bytes": sum(size for m in channel.sent for _, size in m.files),
+        "chars": sum(len(m.content or "") for m in channel.sent),
+    }
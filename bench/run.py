@@ -0,0 +1,318 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import shutil
+import socket
+import resource
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+
+# Offline benchmark: runs manual_report, manual_post_graphs, periodic_news and
+# weekly_report against the fakes in bench/fakes.py at several watchlist sizes.
+# Every (pipeline, size) runs in a fresh process with its own data directory, so
+# peak RSS and cold caches are per run. Results are compared against
+# bench/baseline.json (wall time within a tolerance, upstream calls must not grow);
+# --save writes the current run as the new baseline. The baseline is machine-specific
+# and not committed; record it on the target host. Runs that skipped work (ingest
+# errors, missing charts) are failures: they make the exit code 1, are never saved,
+# and an errored baseline entry fails the comparison.
+#
+#   python bench/run.py                      # compare against the baseline
+#   python bench/run.py --save               # record a new baseline
+#   python bench/run.py --sizes 10,100 --pipelines periodic_news
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PROJECT_DIR)
+
+from fakes import FakeYFinance, UpstreamStub, FakeChannel, FakeInteraction, message_stats, watchlist  # noqa: E402
+
+PIPELINES = ("manual_report", "manual_post_graphs", "periodic_news", "weekly_report")
+CHART_PIPELINES = ("manual_report", "manual_post_graphs")  # one chart per symbol expected
+SIZES = (10, 100, 1000)
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+RESULT_MARKER = "BENCH_RESULT "
+RUN_TIMEOUT = 1800  # seconds per (pipeline, size)
+
+# Upstream quotas and Discord pacing are lifted so timings reflect the bot's own
+# work; the call counts show what the same run would cost against the real APIs.
+BENCH_ENV = {
+    "RATE_LIMIT_YFINANCE": "1000,1000,16",
+    "RATE_LIMIT_NEWSDATA": "1000,1000,16",
+    "RATE_LIMIT_OPENAI": "1000,1000,16",
+    "DISCORD_CHANNEL_RATE": "100000",
+    "METRICS_PORT": "0",
+    "NEWS_RETRIES": "0",
+}
+
+
+def data_env(workdir):
+    # Every data/cache/state path defaults to somewhere under STOCK_BOT_DIR
+    return {"STOCK_BOT_DIR": workdir, "STOCKS_FILE": os.path.join(workdir, "stocks.json")}
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)  # ru_maxrss is in KiB on Linux
+
+
+def seed_weekly_articles(bot, stocks):
+    # Daily summaries as daily_report/manual_report leave them in articles/
+    now = datetime.now(bot.MARKET_TIMEZONE)
+    os.makedirs(os.path.join(bot.DATA_DIR, "articles"), exist_ok=True)
+    for i in range(5):
+        date_str = (now - timedelta(days=4) + timedelta(days=i)).strftime("%Y-%m-%d")
+        lines = [f"{symbol}: {bot.get_symbol_name(symbol)} moved on bench news ({date_str})" for symbol in stocks]
+        with open(os.path.join(bot.DATA_DIR, "articles", f"{date_str}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+
+async def child_run(pipeline, size):
+    stocks = watchlist(size)
+    with open(os.environ["STOCKS_FILE"], "w", encoding="utf-8") as f:
+        json.dump(stocks, f)
+
+    yf = FakeYFinance()
+    yf.install()
+    # Warm metadata cache on disk, as after any earlier run of the bot
+    meta = {s: dict(yf.meta(s), name=yf.meta(s)["shortName"], fetched_at=time.time()) for s in stocks}
+    from symbol_meta import SYMBOL_META_PATH
+    os.makedirs(os.path.dirname(SYMBOL_META_PATH), exist_ok=True)
+    with open(SYMBOL_META_PATH, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    import bot
+
+    # Started only after the import: bot.py forks the chart workers while no threads exist
+    STUB.start()
+    channel = FakeChannel(bot.CHANNEL_ID)
+    bot.bot.get_channel = lambda channel_id: channel
+    # Every market counts as open, otherwise periodic_news depends on the time of day
+    bot.market_calendar.active_symbols = lambda symbols, now=None: list(symbols)
+    bot.loop_monitor.start()
+    charts = {"ok": 0, "failed": 0}
+    render_many = bot.chart_renderer.render_many
+
+    async def counting_render_many(jobs, timeout=None):
+        try:
+            results = await render_many(jobs, timeout=timeout)
+        except asyncio.CancelledError:
+            # Cut off by the pipeline's own timeout
+            charts["failed"] += len(jobs)
+            raise
+        failed = sum(isinstance(r, BaseException) for r in results)
+        charts["ok"] += len(results) - failed
+        charts["failed"] += failed
+        return results
+
+    bot.chart_renderer.render_many = counting_render_many
+
+    # Steady state: price history ingested, today's news fetched
+    symbols = list(stocks)
+    for interval in ("1d", "15m"):
+        await bot.offload.io(bot.price_ingestor.ingest, interval, symbols, True)
+    if pipeline == "manual_report":
+        await bot.article_store.refresh(symbols, bot.news_fetcher)
+    if pipeline == "weekly_report":
+        seed_weekly_articles(bot, stocks)
+
+    for calls in (yf.calls, STUB.calls):
+        for key in calls:
+            calls[key] = 0
+    rss_before = peak_rss_mb()
+    bot.loop_monitor.stats.update(blocks=0, max_lag=0.0)
+
+    started = time.perf_counter()
+    if pipeline == "manual_report":
+        await bot.manual_report.callback(FakeInteraction(channel))
+    elif pipeline == "manual_post_graphs":
+        await bot.manual_post_graphs.callback(FakeInteraction(channel))
+    elif pipeline == "periodic_news":
+        await bot.periodic_news()
+    elif pipeline == "weekly_report":
+        await bot.weekly_report()
+    wall = time.perf_counter() - started
+
+    result = {
+        "wall_s": round(wall, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "setup_rss_mb": rss_before,
+        "upstream": dict(yf.calls, **STUB.calls),
+        "discord": message_stats(channel),
+        "loop_max_lag_s": round(bot.loop_monitor.stats["max_lag"], 3),
+        "charts": charts["ok"],
+        "weasyprint": getattr(sys.modules.get("weasyprint"), "__version__", "unknown"),
+    }
+    # A run that silently skipped work is not a valid measurement
+    problems = []
+    if bot.price_ingestor.stats["errors"]:
+        problems.append(f"{bot.price_ingestor.stats['errors']} ingest errors")
+    if pipeline in CHART_PIPELINES and charts["ok"] < size:
+        problems.append(f"{charts['ok']}/{size} charts rendered ({charts['failed']} failed)")
+    if problems:
+        result["error"] = "; ".join(problems)
+
+    bot.loop_monitor.stop()
+    await bot.news_fetcher.close()
+    await bot.outbox.close()
+    await bot.webhooks.close()
+    bot.chart_renderer.shutdown()
+    bot.report_renderer.shutdown()
+    bot.offload.shutdown()
+    result["chart_workers_peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    return result
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def child_main(pipeline, size, workdir):
+    global STUB
+    os.environ.update(data_env(workdir))
+    os.makedirs(os.path.join(workdir, "cache"), exist_ok=True)
+    STUB = UpstreamStub(port=free_port())
+    os.environ.update(
+        NEWSDATA_URL=f"{STUB.base_url}/api/1/news",
+        NEWSDATA_API_KEY="bench",
+        OPENAI_BASE_URL=f"{STUB.base_url}/v1",
+        OPENAI_API_KEY="bench",
+    )
+    try:
+        result = asyncio.run(child_run(pipeline, size))
+    finally:
+        STUB.stop()
+    print(RESULT_MARKER + json.dumps(result), flush=True)
+
+
+def run_one(pipeline, size, keep=False):
+    workdir = tempfile.mkdtemp(prefix=f"stockbot-bench-{pipeline}-{size}-")
+    env = dict(os.environ, **BENCH_ENV)
+    env.setdefault("DISCORD_BOT_TOKEN", "bench")
+    env.setdefault("DISCORD_GUILD_ID", "1")
+    env.setdefault("DISCORD_CHANNEL_ID", "1")
+    # Empty rather than unset, so a .env next to bot.py cannot bring real webhooks back
+    env.update(STOCK_GRAPH_WEBHOOK_URL="", ERROR_WEBHOOK_URL="")
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", pipeline, str(size), workdir]
+    try:
+        proc = subprocess.run(cmd, env=env, cwd=workdir, capture_output=True, text=True, timeout=RUN_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return {"error": f"timeout after {RUN_TIMEOUT}s"}
+    finally:
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    return {"error": (proc.stderr or proc.stdout).strip().splitlines()[-5:]}
+
+
+def compare(results, baseline, tolerance):
+    # Returns a list of human-readable regressions
+    regressions = []
+    for pipeline, by_size in results.items():
+        for size, current in by_size.items():
+            old = baseline.get("results", {}).get(pipeline, {}).get(size)
+            if not old:
+                continue
+            label = f"{pipeline}@{size}"
+            if "error" in old:
+                # An errored entry can't gate anything; don't let it pass silently
+                regressions.append(f"{label}: baseline entry is an error ({old['error']}), re-record it")
+                continue
+            if "error" in current:
+                regressions.append(f"{label}: failed ({current['error']})")
+                continue
+            if current["wall_s"] > old["wall_s"] * (1 + tolerance) and current["wall_s"] - old["wall_s"] > 0.5:
+                regressions.append(f"{label}: wall {old['wall_s']:.2f}s -> {current['wall_s']:.2f}s")
+            if current["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance):
+                regressions.append(f"{label}: peak RSS {old['peak_rss_mb']:.0f} -> {current['peak_rss_mb']:.0f} MB")
+            for key, n in current["upstream"].items():
+                if n > old["upstream"].get(key, 0):
+                    regressions.append(f"{label}: {key} calls {old['upstream'].get(key, 0)} -> {n}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks against local fakes")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    parser.add_argument("--pipelines", default=",".join(PIPELINES))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed wall time / RSS growth")
+    parser.add_argument("--keep", action="store_true", help="keep per-run data directories")
+    parser.add_argument("--child", nargs=3, metavar=("PIPELINE", "SIZE", "WORKDIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        pipeline, size, workdir = args.child
+        child_main(pipeline, int(size), workdir)
+        return 0
+
+    pipelines = [p for p in args.pipelines.split(",") if p]
+    unknown = set(pipelines) - set(PIPELINES)
+    if unknown:
+        parser.error(f"unknown pipelines: {', '.join(sorted(unknown))}")
+    sizes = [str(int(s)) for s in args.sizes.split(",") if s]
+
+    results = {}
+    failed = []
+    for pipeline in pipelines:
+        for size in sizes:
+            result = run_one(pipeline, int(size), args.keep)
+            results.setdefault(pipeline, {})[size] = result
+            if "error" in result:
+                failed.append(f"{pipeline}@{size}")
+                print(f"❌ {pipeline:<20} {size:>5}  {result['error']}")
+            else:
+                up = result["upstream"]
+                print(
+                    f"⏱️ {pipeline:<20} {size:>5}  {result['wall_s']:>8.2f}s  {result['peak_rss_mb']:>7.1f} MB  "
+                    f"yf {up['download']}+{up['quote']}+{up['info']}  news {up['newsdata']}  llm {up['openai']}  "
+                    f"msgs {result['discord']['messages']}"
+                )
+
+    if failed:
+        print(f"❌ {len(failed)} runs failed: {', '.join(failed)}")
+
+    if args.save and failed:
+        print("❌ Not saving a baseline with failed runs")
+        return 1
+    if args.save:
+        baseline = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": f"{platform.machine()}, {os.cpu_count()} CPUs",
+            "env": BENCH_ENV,
+            "results": results,
+        }
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                old = json.load(f).get("results", {})
+            for pipeline, by_size in old.items():
+                for size, result in by_size.items():
+                    baseline["results"].setdefault(pipeline, {}).setdefault(size, result)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"💾 Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("ℹ️ No baseline yet, run with --save to record one")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for line in regressions:
+        print(f"⚠️ {line}")
+    print("✅ No regressions" if not regressions else f"❌ {len(regressions)} regressions")
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,35 +1,63 @@
 import os
+import shutil
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from dotenv import load_dotenv
 from datetime import datetime
 import requests
-import json
 from pathlib import Path
 import openai
-from hashlib import sha1
 from pathlib import Path
 from weasyprint import HTML
 from datetime import timezone, timedelta
-import matplotlib.dates as mdates
 from bs4 import BeautifulSoup
-from PyPDF2 import PdfMerger
 import pytz, asyncio
 from datetime import datetime, timezone
 from discord import app_commands
 import pytz
-import yfinance as yf
-import matplotlib.pyplot as plt
+from prices import PriceSnapshot, INTRADAY, WEEK
+from timeseries import PriceStore
+from ingest import PriceIngestor
+from summarize import Summarizer
+from discord_out import Outbox
+from cleanup import ChannelCleaner, format_progress
+from scheduler import Scheduler
+from offload import Offload, LoopLagMonitor
+from webhooks import WebhookDispatcher
+from ratelimit import upstream_priority, INTERACTIVE, stats_lines as rate_limit_lines, all_stats as rate_limit_stats
+from metrics import metrics, MetricsServer, hit_rate
+from markets import MarketCalendar
+from watchlist import SymbolRegistry, ADDED
+from symbol_import import (
+    MAX_IMPORT_SYMBOLS, parse_symbols, parse_attachment, split_valid, classify, result_table, summary_line,
+)
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from analytics import (
+    aligned_matrices, compute_metrics, watchlist_metrics,
+    change_lines, metrics_lines, movers_text,
+)
+import numpy as np
+from symbol_meta import SymbolMetaCache
+from news_dedup import PostedNewsStore
+from news_fetcher import NewsFetcher
+from article_store import ArticleStore, article_id, today_str
+from pdf_assembly import images_to_pdf, merge_pdfs
+from reports import ReportRenderer, chart_block, chart_error_block
+from charts import ChartRenderer, chart_job, job_key, content_keys, INTRADAY_SPEC, WEEK_SPEC
+
+# name/quoteType/exchange/currency cache, filled in the background
+symbol_meta = SymbolMetaCache()
 
 def get_symbol_name(symbol):
-    try:
-        info = yf.Ticker(symbol).info
-        return info.get("shortName") or symbol
-    except Exception:
-        return symbol
+    return symbol_meta.name(symbol)
+
 
+# Base directory for articles, prices, charts and reports
+DATA_DIR = os.getenv("STOCK_BOT_DIR", "/opt/stock-bot")
 
-POSTED_PDF_DIR = "/opt/stock-bot/posted_pdfs"
+POSTED_PDF_DIR = os.path.join(DATA_DIR, "posted_pdfs")
 os.makedirs(POSTED_PDF_DIR, exist_ok=True)
 
 def sanitize_filename(title):
@@ -59,13 +87,9 @@ def clear_posted_pdfs():
 
 
 def generate_daily_report_from_pdfs(date_str):
-    merger = PdfMerger()
-    for file in sorted(Path(POSTED_PDF_DIR).glob("*.pdf")):
-        merger.append(str(file))
     output_path = os.path.join(POSTED_PDF_DIR, f"report_{date_str}.pdf")
-    merger.write(output_path)
-    merger.close()
-    return output_path
+    files = [f for f in sorted(Path(POSTED_PDF_DIR).glob("*.pdf")) if str(f) != output_path]
+    return merge_pdfs(files, output_path)
 
 load_dotenv()
 MARKET_TIMEZONE = pytz.timezone(os.getenv("MARKET_TIMEZONE", "Europe/Berlin"))
@@ -76,142 +100,208 @@ GUILD_ID = int(os.getenv("DISCORD_GUILD_ID"))
 CHANNEL_ID = int(os.getenv("DISCORD_CHANNEL_ID"))
 ERROR_WEBHOOK_URL = os.getenv("ERROR_WEBHOOK_URL")
 NEWSDATA_API_KEY = os.getenv("NEWSDATA_API_KEY")
-POSTED_NEWS_PATH = "posted_news.json"
 openai.api_key = os.getenv("OPENAI_API_KEY")
-STOCKS_FILE = "stocks.json"
 
 intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="!", intents=intents)
+class StockBotTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction):
+        # Runs in the command's task: slash commands overtake background jobs at the upstream limiters
+        upstream_priority.set(INTERACTIVE)
+        interaction.extras["started"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction, error):
+        observe_command(interaction, "error")
+        await super().on_error(interaction, error)
+
+
+def observe_command(interaction, status):
+    started = interaction.extras.get("started")
+    if started is not None:
+        name = interaction.command.qualified_name if interaction.command else "unknown"
+        metrics.observe("command_seconds", time.perf_counter() - started, command=name, status=status)
+
+
+bot = commands.Bot(command_prefix="!", intents=intents, tree_cls=StockBotTree)
+
+
+# Tracked symbols, held in memory and reloaded only when stocks.json changes
+watchlist = SymbolRegistry()
 
 
 def load_stocks():
-    try:
-        with open(STOCKS_FILE, "r") as f:
-            data = json.load(f)
-        if isinstance(data, dict):
-            return data  # Format: {"AAPL": "Stock", ...}
-        elif isinstance(data, list):
-            return {s.upper(): "Unknown" for s in data if isinstance(s, str)}
-    except Exception as e:
-        print(f"⚠️ Error loading stock list: {e}")
-    return {}
+    return watchlist.all()  # Format: {"AAPL": "Stock", ...}
 
 
 def save_stocks(stocks: dict):
-    with open(STOCKS_FILE, "w") as f:
-        json.dump(stocks, f, indent=2)
+    watchlist.replace(stocks)
+
+
+# Bounded pools for blocking network I/O, CPU work and LLM calls
+offload = Offload()
+
+# Reports which call blocked the event loop and for how long
+loop_monitor = LoopLagMonitor()
+
+# Local OHLCV history (per symbol/interval, memory-mapped)
+price_store = PriceStore()
+
+# Fetches only bars newer than the last stored one
+price_ingestor = PriceIngestor(price_store)
+
+# OHLCV for the whole watchlist, shared by charts, changes and price lists
+price_snapshot = PriceSnapshot(lambda: list(load_stocks()), store=price_store, ingestor=price_ingestor, tz=MARKET_TIMEZONE)
+
+# Chart workers are forked here, before the bot starts any threads
+chart_renderer = ChartRenderer(io=offload.io)
+chart_renderer.start()
+
+# Warm caches for new symbols, drop them for removed ones
+watchlist_jobs = ThreadPoolExecutor(max_workers=1, thread_name_prefix="watchlist")
 
 
+def warm_symbol(symbol):
+    for interval in (INTRADAY[1], WEEK[1]):
+        price_ingestor.ingest(interval, [symbol], force=True)
+    price_snapshot.invalidate()
 
-def send_error_webhook(message):
+
+@watchlist.subscribe
+def on_watchlist_change(event, symbol, symbol_type):
+    price_snapshot.invalidate()
+    if event == ADDED:
+        symbol_meta.refresh_in_background([symbol])
+        watchlist_jobs.submit(warm_symbol, symbol)
+    else:
+        symbol_meta.evict(symbol)
+    print(f"[Watchlist] {symbol} {event} ({symbol_type})")
+
+
+# WeasyPrint in a dedicated worker with warm fonts/stylesheet
+report_renderer = ReportRenderer()
+
+# Map-reduce GPT summaries with on-disk response cache (calls run on the LLM pool)
+summarizer = Summarizer(executor=offload.executor("llm"))
+
+# Packs news into few messages and paces sends per channel
+outbox = Outbox()
+
+# Bulk delete for recent messages, paced single deletes for older ones (resumable)
+channel_cleaner = ChannelCleaner()
+
+# Per-exchange sessions and holidays (crypto 24/7)
+market_calendar = MarketCalendar(meta=symbol_meta)
+
+# Cron-like jobs in market time; missed runs are caught up once after a restart.
+# trading_days jobs run on days on which at least one watched market trades.
+scheduler = Scheduler(
+    MARKET_TIMEZONE,
+    trading_day=lambda day: market_calendar.any_trading_day(load_stocks(), day),
+    on_error=lambda name, e: send_error_webhook(f"⏰ Job {name} failed: {e}"),
+)
+
+
+def send_error_webhook(message, key=None):
+    # Non-blocking; repeats of the same key within ERROR_COALESCE_WINDOW are merged into one message
+    webhooks.report(ERROR_WEBHOOK_URL, message, key)
+
+
+def post_error_webhook(message, url=None):
     try:
-        requests.post(ERROR_WEBHOOK_URL, json={"content": message})
+        requests.post(url or ERROR_WEBHOOK_URL, json={"content": message}, timeout=10)
     except Exception as e:
         print(f"[Webhook Error] {e}")
+
+
+# Pooled async webhook client (errors + graph uploads); before start it falls back to the I/O pool
+webhooks = WebhookDispatcher(fallback=lambda url, content: offload.submit("io", post_error_webhook, content, url), io=offload.io)
+
+# Prometheus text on METRICS_HOST:METRICS_PORT/metrics (0 = off)
+metrics_server = MetricsServer()
+
 from datetime import timedelta
 
-def get_news_for_symbol(symbol):
-    today = datetime.now(timezone.utc).date()
-    news_items = []
+news_fetcher = NewsFetcher(NEWSDATA_API_KEY, name_lookup=get_symbol_name)
 
-    posted = load_posted_news()
 
-    # === 2. Newsdata.io ===
-    try:
-        url = f"https://newsdata.io/api/1/news"
-        params = {
-            "apikey": NEWSDATA_API_KEY,
-            "q": symbol,
-            "language": "en",
-            "country": "us,de,gb",
-            "category": "business"
-        }
-        r = requests.get(url, params=params)
-        if r.status_code == 200:
-            data = r.json()
-            articles = data.get("results", [])
-            for item in articles[:5]:
-                title = item.get("title")
-                link = item.get("link")
-                pub_date = item.get("pubDate")  # ISO 8601 z.B. 2025-06-14T08:33:00Z
-                source = item.get("source_id", "Newsdata")
-
-                if not (title and link and pub_date):
-                    continue
-
-                pub_date_dt = datetime.fromisoformat(pub_date.replace("Z", "+00:00")).date()
-                if pub_date_dt != today:
-                    continue
-
-                news_id = hash_news(title, link)
-                if news_id in posted:
-                    continue
-                posted[news_id] = True
-                news_items.append(f"🗞️ [{title}]({link}) ({source})")
-    except Exception as e:
-        print(f"[Newsdata Error] {symbol}: {e}")
+article_store = ArticleStore(io=offload.io)
 
-    # Speichere, was gepostet wurde
-    save_posted_news(posted)
 
-    return news_items if news_items else []
+def format_news_item(article):
+    return f"🗞️ [{article['title']}]({article['link']}) ({article['source']})"
 
-# === News cache for duplicate prevention ===
-POSTED_NEWS_PATH = "posted_news.json"
 
-def load_posted_news():
-    if Path(POSTED_NEWS_PATH).exists():
-        with open(POSTED_NEWS_PATH, "r") as f:
-            return json.load(f)
-    return {}
+def select_news_items(articles, only_new=False, limit=5):
+    # only_new: skip (and mark) articles that were already posted.
+    # Marks are buffered; callers write them with posted_news.flush()
+    news_items = []
+    for article in articles:
+        if only_new and not posted_news.add(article["id"], flush=False):
+            continue
+        news_items.append(format_news_item(article))
+        if len(news_items) >= limit:
+            break
+    return news_items
+
+
+async def get_news_for_symbol(symbol, only_new=True):
+    await article_store.refresh([symbol], news_fetcher)
+    items = select_news_items(article_store.articles(symbols=[symbol]), only_new)
+    if only_new:
+        await offload.io(posted_news.flush)
+    return items
 
-def save_posted_news(data):
-    with open(POSTED_NEWS_PATH, "w") as f:
-        json.dump(data, f)
+# === News cache for duplicate prevention ===
+posted_news = PostedNewsStore()
 
 def is_duplicate(news_id):
-    posted = load_posted_news()
-    return news_id in posted
+    return news_id in posted_news
 
 def mark_as_posted(news_id):
-    posted = load_posted_news()
-    posted[news_id] = True
-    save_posted_news(posted)
+    posted_news.add(news_id)
 
 def hash_news(title, url):
-    return sha1(f"{title}{url}".encode()).hexdigest()
+    return article_id(title, url)
 
 
-def fetch_news(tickers):
-    all_news = []
+async def fetch_news_sections(tickers, only_new=False):
+    # Returns ([section per symbol], number of news items)
+    sections = []
+    items = 0
     errors = []
 
+    tickers = list(tickers)
+    await article_store.refresh(tickers, news_fetcher)
+    grouped = article_store.by_symbol(symbols=tickers)
     for ticker in tickers:
-        news = get_news_for_symbol(ticker)
+        news = select_news_items(grouped.get(ticker, []), only_new)
         if news and not news[0].startswith("❌"):
-            all_news.append(f"**{get_symbol_name(ticker)} ({ticker})**\n" + "\n".join(news))
+            sections.append(f"**{get_symbol_name(ticker)} ({ticker})**\n" + "\n".join(news))
+            items += len(news)
         #else:
         #    errors.append(f"{ticker}: No usable news found")
+    if only_new:
+        await offload.io(posted_news.flush)
 
     if errors:
         error_msg = "⚠️ **error while retrieving stock news**\n" + "\n".join(errors)
         send_error_webhook(error_msg)
 
-    return "\n\n".join(all_news) #if all_news else "✅ No new messages found."
+    return sections, items
+
+
+async def fetch_news(tickers, only_new=False):
+    sections, _ = await fetch_news_sections(tickers, only_new)
+    return "\n\n".join(sections) #if all_news else "✅ No new messages found."
 
-def generate_daily_report(text_content, date_str):
+async def generate_daily_report(sections, date_str):
     try:
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        response = client.chat.completions.create(
-            model="gpt-4.1-nano",
-            messages=[
-                {"role": "system", "content": "Fasse die folgenden Finanznachrichten professionell und strukturiert zusammen."},
-                {"role": "user", "content": f"Erstelle einen daily report aus diesen Aktiennews:\n{text_content}"}
-            ]
+        summary = await summarizer.summarize(
+            sections,
+            "Fasse die folgenden Finanznachrichten professionell und strukturiert zu einem daily report zusammen.",
         )
-        summary = response.choices[0].message.content
         # 🆕 Speichere die Artikel-Zusammenfassung in Datei
-        article_path = f"/opt/stock-bot/articles/{date_str}.txt"
+        article_path = f"{DATA_DIR}/articles/{date_str}.txt"
         os.makedirs(os.path.dirname(article_path), exist_ok=True)
         with open(article_path, "w", encoding="utf-8") as f:
             # Entfernt führende Leerzeichen je Zeile
@@ -226,90 +316,90 @@ def generate_daily_report(text_content, date_str):
         send_error_webhook(f"⚠️ Error generating report: {e}")
         summary = f"⚠️ Error generating report: {e}"
 
-    html = f"""
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <style>
-            body {{ font-family: Arial, sans-serif; padding: 20px; }}
-            h1 {{ color: #333; }}
-            p {{ margin: 10px 0; }}
-        </style>
-    </head>
-    <body>
-        <h1>📈 Aktien-daily report – {date_str}</h1>
-        <p>{summary.replace('\n', '<br>')}</p>
-    </body>
-    </html>
-    """
-    os.makedirs(POSTED_PDF_DIR, exist_ok=True)
     output_path = os.path.join(POSTED_PDF_DIR, f"report_{date_str}.pdf")
-    HTML(string=html).write_pdf(output_path)
-    return output_path
+    return await report_renderer.daily(date_str, summary, output_path)
 
 def load_daily_articles(date_str):
-    path = f"/opt/stock-bot/articles/{date_str}.txt"
+    path = f"{DATA_DIR}/articles/{date_str}.txt"
     if os.path.exists(path):
         with open(path, "r", encoding="utf-8") as f:
             return f.read()
     return "⚠️ No article data available for this day."
 
+def day_bounds(date_str):
+    # Daily bars are stored at 00:00 UTC of their trading date
+    start = int(datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+    return start, start + 86400
+
+
+def stored_price_lines(date_str, symbols=None):
+    start, end = day_bounds(date_str)
+    lines = []
+    for symbol in symbols if symbols is not None else load_stocks():
+        bars = price_store.range(symbol, "1d", start, end)
+        if len(bars):
+            lines.append(f"{symbol}: {bars['close'][-1]:.2f} EUR")
+    return lines
+
+
+def stored_week_changes(dates, symbols=None):
+    start, _ = day_bounds(dates[0])
+    _, symbols, m = aligned_matrices(price_store, symbols if symbols is not None else load_stocks(), "1d", start)
+    stats = compute_metrics(m["close"], m["high"], m["low"])
+    lines = []
+    for i, symbol in enumerate(symbols):
+        if not np.isnan(stats["period_return"][i]):
+            lines.append(f"{symbol}: {stats['last'][i]:.2f} EUR ({stats['period_return'][i] * 100:+.2f}%)")
+    movers = movers_text(symbols, stats["period_return"], label="der Woche")
+    if movers:
+        lines.append(movers)
+    return lines
+
+
 def load_daily_prices(date_str):
-    path = f"/opt/stock-bot/prices/{date_str}.txt"
+    path = f"{DATA_DIR}/prices/{date_str}.txt"
     if os.path.exists(path):
         with open(path, "r", encoding="utf-8") as f:
             return f.read()
     return "⚠️ No price data available for this day."
 
 
-def is_market_open():
-    now = datetime.now(MARKET_TIMEZONE)
-    weekday = now.weekday()
-    hour = now.hour
-    minute = now.minute
-    # Default NYSE hours in Europe/Berlin timezone: 08:00–22:00
-    if weekday >= 5:
-        return False
-    if (hour > 8 or (hour == 8 and minute >= 00)) and (hour < 22):
-        return True
-    return False
+def is_market_open(symbols=None):
+    # True if any market of the given (default: all tracked) symbols is open or just closed
+    return bool(market_calendar.active_symbols(load_stocks() if symbols is None else symbols))
 
 
 
-@tasks.loop(minutes=30)
 async def periodic_news():
-    if not is_market_open(): return
+    # Nur Symbole, deren Börse offen ist oder gerade geschlossen hat
+    tickers = market_calendar.active_symbols(load_stocks())
+    if not tickers: return
+    await offload.io(posted_news.evict)
     channel = bot.get_channel(CHANNEL_ID)
-    tickers = load_stocks()
-    news_sections = []
-
-    for symbol in tickers:
-        news = get_news_for_symbol(symbol)
-        if news:
-            news_sections.append(f"**{get_symbol_name(symbol)} ({symbol})**\\n" + "\\n".join(news))
+    news_sections, items = await fetch_news_sections(tickers, only_new=True)
 
     if news_sections:
         now = datetime.now().strftime("%Y-%m-%d %H:%M")
         header = f"🕑 **Current News ({now})**"
-        content = "\n\n".join(news_sections)
-        chunks = [content[i:i+1900] for i in range(0, len(content), 1900)]
+        # Packt Abschnitte an Zeilen-/Link-Grenzen in möglichst wenige Nachrichten
+        await outbox.deliver(channel.id, channel.send, news_sections, header=header, items=items)
 
-        await channel.send(header)
-        for chunk in chunks:
-            await channel.send(chunk)
+async def ingest_prices():
+    symbols = list(market_calendar.active_symbols(load_stocks()))
+    if not symbols: return
+    try:
+        for interval in (INTRADAY[1], WEEK[1]):
+            await offload.io(price_ingestor.ingest, interval, symbols)
+    except Exception as e:
+        print(f"[Ingest error] {e}")
 
-@tasks.loop(hour=22)
 async def daily_news():
     #if not is_market_open(): return
     channel = bot.get_channel(CHANNEL_ID)
     stocks = load_stocks()
-    news = fetch_news(stocks)
+    sections, items = await fetch_news_sections(stocks)
     now = datetime.now().strftime("%Y-%m-%d %H:%M")
-    await channel.send(f"🗞 **Daily Stock News ({now})**\n{news}")
-
-@tasks.loop(minutes=60)
-async def weekly_report_scheduler():
-    await weekly_report()
+    await outbox.deliver(channel.id, channel.send, sections, header=f"🗞 **Daily Stock News ({now})**", items=items)
 
 
 @bot.tree.command(name="news", description="Manually post current stock news")
@@ -319,65 +409,81 @@ async def manual_news(interaction: discord.Interaction):
     #    return
     await interaction.response.defer()
     stocks = load_stocks()
-    news = fetch_news(stocks)
+    sections, items = await fetch_news_sections(stocks)
     now = datetime.now().strftime("%Y-%m-%d %H:%M")
-    await interaction.followup.send(f"🗞 **Current stock news ({now})**\n{news}")
+    await outbox.deliver(
+        f"interaction-{interaction.id}", interaction.followup.send, sections,
+        header=f"🗞 **Current stock news ({now})**", items=items,
+    )
 
-def get_symbol_type(symbol):
-    try:
-        with open("/opt/stock-bot/stocks.json", "r") as f:
-            data = json.load(f)
-        if isinstance(data, dict):
-            for key in data:
-                if key.upper() == symbol.upper():
-                    return data[key]
-    except Exception as e:
-        print(f"⚠️ Error reading stocks.json in get_symbol_type(): {e}")
-    return "Unknown"
+def get_symbol_type(symbol, stocks=None):
+    # Pass the already loaded stock dict when calling in a loop
+    # Watchlist keys are upper-case, so this is a plain dict lookup
+    if stocks is None:
+        stocks = load_stocks()
+    return stocks.get(symbol.upper(), "Unknown")
 
 
 
-@bot.tree.command(name="addstock", description="Add stock, ETF or crypto (with automatic type detection)")
-async def add_stock(interaction: discord.Interaction, symbol: str):
-    await interaction.response.defer()
+async def send_result_table(interaction, title, rows):
+    text = f"{title}\n{summary_line(rows)}"
+    table = result_table(rows)
+    if len(text) + len(table) + 10 <= 2000:
+        await interaction.followup.send(f"{text}\n```\n{table}\n```")
+    else:
+        # Große Tabellen als Datei anhängen
+        await interaction.followup.send(text, file=discord.File(io.BytesIO(table.encode()), filename="symbols.txt"))
 
-    symbol = symbol.upper()
-    stocks = load_stocks()
 
-    if symbol in stocks:
-        await interaction.followup.send(f"⚠️ `{symbol}` is already registered as `{stocks[symbol]}`.")
-        return
+@bot.tree.command(name="addstock", description="Add stocks, ETFs or crypto (comma-separated list or file, automatic type detection)")
+async def add_stock(interaction: discord.Interaction, symbol: str = None, file: discord.Attachment = None):
+    await interaction.response.defer()
 
-    # Auto-detect Crypto
-    if symbol.endswith("-EUR"):
-        try:
-            yf.Ticker(symbol).history(period="1d")  # Test if it works
-            symbol_type = "Crypto"
-        except Exception:
-            await interaction.followup.send(f"❌ `{symbol}` not found or not supported.")
-            return
-    else:
-        # Live detection via yfinance
+    symbols = parse_symbols(symbol)
+    if file is not None:
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            quote_type = info.get("quoteType", "").lower()
-
-            if quote_type == "etf":
-                symbol_type = "ETF"
-            elif quote_type in ["equity", "stock"]:
-                symbol_type = "Stock"
-            else:
-                raise ValueError("Unrecognized quoteType")
+            symbols += parse_attachment(await file.read(), file.filename)
         except Exception as e:
-            await interaction.followup.send(f"❌ Symbol `{symbol}` could not be identified as a stock or ETF.")
-            print(f"⚠️ Failed to identify symbol {symbol}: {e}")
+            await interaction.followup.send(f"❌ Could not read `{file.filename}`: {e}")
             return
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        await interaction.followup.send("⚠️ Please provide a symbol, a comma-separated list or a file.")
+        return
+    if len(symbols) > MAX_IMPORT_SYMBOLS:
+        await interaction.followup.send(f"⚠️ At most {MAX_IMPORT_SYMBOLS} symbols per import.")
+        return
 
-    # Save
-    stocks[symbol] = symbol_type
-    save_stocks(stocks)
-    await interaction.followup.send(f"✅ `{symbol}` added as `{symbol_type}`.")
+    symbols, rejected = split_valid(symbols)
+    existing = load_stocks()
+    new = [s for s in symbols if s not in existing]
+
+    # Live detection via batched Yahoo quote lookups (off the event loop)
+    resolved = classify(await offload.io(symbol_meta.resolve, new)) if new else {}
+    # Save (listeners warm metadata and price history)
+    added, _ = watchlist.update(added={s: typ for s, (status, typ, _) in resolved.items() if status == "ok"})
+
+    rows = []
+    for s in symbols:
+        if s in existing:
+            rows.append((s, "exists", existing[s], symbol_meta.get_cached(s)))
+            continue
+        status, typ, meta = resolved[s]
+        if status == "ok":
+            status = "added" if s in added else "exists"
+        rows.append((s, status, typ, meta))
+    rows += [(s, "invalid", None, None) for s in rejected]
+
+    if len(rows) == 1:
+        s, status, typ, meta = rows[0]
+        if status == "added":
+            await interaction.followup.send(f"✅ `{s}` added as `{typ}`.")
+        elif status == "exists":
+            await interaction.followup.send(f"⚠️ `{s}` is already registered as `{typ}`.")
+        else:
+            await interaction.followup.send(f"❌ Symbol `{s}` could not be identified as a stock, ETF or crypto ({status}).")
+        return
+    await send_result_table(interaction, f"📥 **Import: {len(added)} of {len(rows)} symbols added**", rows)
 
 
 
@@ -385,34 +491,33 @@ async def add_stock(interaction: discord.Interaction, symbol: str):
 @bot.tree.command(name="removestock", description="Remove stock or ETF from list")
 async def remove_stock(interaction: discord.Interaction, symbol: str):
     symbol = symbol.upper()
-    stocks = load_stocks()
-    if symbol not in stocks:
+    if not watchlist.remove(symbol):
         await interaction.response.send_message(f"⚠️ `{symbol}` not found.")
         return
-    del stocks[symbol]
-    save_stocks(stocks)
     await interaction.response.send_message(f"🗑️ `{symbol}` removed.")
 
 @bot.tree.command(name="validate_stocks", description="Validates all saved tickers for correctness and type")
 async def validate_stocks(interaction: discord.Interaction):
     await interaction.response.defer()
     stocks = load_stocks()
-    updated = {}
-    failed = []
-
-    for symbol in stocks.keys():
-        typ = get_symbol_type(symbol)
-        if typ and typ != "Unknown":
-            updated[symbol] = typ
-        else:
+    resolved = classify(await offload.io(symbol_meta.resolve, list(stocks)))
+
+    types, failed, rows = {}, [], []
+    for symbol, old_type in stocks.items():
+        status, typ, meta = resolved[symbol]
+        if status == "ok":
+            types[symbol] = typ
+            rows.append((symbol, "ok" if typ == old_type else "updated", typ, meta))
+        elif status in ("not found", "unsupported"):
             failed.append(symbol)
+            rows.append((symbol, "removed", old_type, meta))
+        else:
+            # Lookup failed (network etc.): keep the symbol
+            rows.append((symbol, "error", old_type, meta))
 
-    save_stocks(updated)
-    result = f"✅ {len(updated)} valid symbols updated.\n"
-    if failed:
-        result += f"❌ {len(failed)} invalid symbols removed:\n" + ", ".join(failed)
-
-    await interaction.followup.send(result)
+    watchlist.set_types(types)
+    watchlist.update(removed=failed)
+    await send_result_table(interaction, f"✅ {len(types)} valid symbols, ❌ {len(failed)} invalid symbols removed", rows)
 
 @bot.tree.command(name="clear", description="Deletes all messages in the current channel (nur Admins!)")
 @app_commands.checks.has_permissions(administrator=True)
@@ -420,17 +525,22 @@ async def clear(interaction: discord.Interaction):
     await interaction.response.defer(thinking=True)
 
     channel = interaction.channel
-    deleted = 0
+    status = None
+
+    async def progress(stats):
+        nonlocal status
+        # Interaction tokens expire after 15 minutes; progress is best effort
+        if status is None:
+            status = await interaction.followup.send(format_progress(stats), wait=True)
+        else:
+            await status.edit(content=format_progress(stats))
 
     try:
-        async for message in channel.history(limit=None):
-            try:
-                await message.delete()
-                deleted += 1
-            except Exception as e:
-                print(f"❌ Error while deleting: {e}")
-
-        await interaction.followup.send(f"🧹 {deleted} Messages deleted.")
+        if channel_cleaner.pending(channel.id):
+            await interaction.followup.send("⏯️ Resuming previous cleanup …")
+        original = await interaction.original_response()
+        stats = await channel_cleaner.clear(channel, progress=progress, keep={original.id})
+        await interaction.followup.send(format_progress(stats, done=True))
     except Exception as e:
         await interaction.followup.send(f"⚠️ Error while deleting: {e}")
 
@@ -446,104 +556,65 @@ async def manual_report(interaction: discord.Interaction):
     articles = load_daily_articles(date_str)
     prices_today = []  
     chart_html_blocks = []
-    chart_dir = "/opt/stock-bot/pngs"
+    chart_dir = os.path.join(DATA_DIR, "pngs")
     os.makedirs(chart_dir, exist_ok=True)
 
     #await interaction.followup.send("📈 Generating intraday charts for today...")
 
     import asyncio
 
-    async def generate_intraday_chart(symbol):
-        try:
-            def plot_chart():
-                try:
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period="1d", interval="15m")
-                    if hist.empty:
-                        return None
-
-                    plt.figure(figsize=(6, 3))
-                    plt.plot(hist.index, hist["Close"], marker="o")
-                    plt.title(f"{get_symbol_name(symbol)} ({symbol}) – Tagesverlauf")
-                    plt.xlabel("Zeit")
-                    plt.ylabel("Kurs")
-                    plt.grid(True)
-                    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-                    plt.gcf().autofmt_xdate(rotation=45)
-
-                    img_path = os.path.join(chart_dir, f"{symbol}_intraday.png")
-                    plt.tight_layout()
-                    plt.savefig(img_path)
-                    plt.close()
-
-                    return f"<h3>{symbol}</h3><img src='file://{img_path}' width='600'>"
-                except Exception as e:
-                    print(f"❌ Fehler bei Chart für {symbol}: {e}")
-                    return f"<p>⚠️ {symbol}: Error creating chart</p>"
-
-            return await asyncio.wait_for(asyncio.to_thread(plot_chart), timeout=10)
-        except asyncio.TimeoutError:
-            print(f"⚠️ Timeout bei {symbol}")
-            return f"<p>⚠️ {symbol}: Chart creation timeout</p>"
+    # Two batched downloads for the whole watchlist instead of several per symbol
+    try:
+        await asyncio.wait_for(offload.io(price_snapshot.prefetch, (INTRADAY, WEEK), True), timeout=60)
+    except asyncio.TimeoutError:
+        print("⚠️ Timeout loading price snapshot")
 
-    chart_html_blocks = []
-    for i, symbol in enumerate(stock_symbols, 1):
-        #await interaction.followup.send(f"📊 [{i}/{len(stock_symbols)}] Erzeuge Chart für {symbol}...")
-        try:
-            html_block = await generate_intraday_chart(symbol)
-            if html_block:
-                chart_html_blocks.append(html_block)
-        except Exception as e:
-            print(f"❌ Fehler bei {symbol}: {e}")
+    # Alle Intraday-Charts parallel im Prozess-Pool rendern
+    chart_jobs = []
+    for symbol in stock_symbols:
+        hist = price_snapshot.history(symbol, *INTRADAY)
+        if hist.empty:
+            continue
+        img_path = os.path.join(chart_dir, f"{symbol}_intraday.png")
+        chart_jobs.append(chart_job(symbol, get_symbol_name(symbol), hist, INTRADAY_SPEC, img_path))
 
+    chart_html_blocks = []
+    # Nach dem Timeout zählen nur die noch offenen Charts als fehlgeschlagen
+    results = await chart_renderer.render_many(chart_jobs, timeout=120)
+    timed_out = sum(isinstance(r, asyncio.TimeoutError) for r in results)
+    if timed_out:
+        print(f"⚠️ Timeout bei Chart-Erstellung: {timed_out}/{len(chart_jobs)} Charts offen")
+    for job, result in zip(chart_jobs, results):
+        symbol = job["symbol"]
+        if isinstance(result, BaseException):
+            print(f"❌ Fehler bei Chart für {symbol}: {result}")
+            chart_html_blocks.append(chart_error_block(symbol))
+        else:
+            chart_html_blocks.append(chart_block(symbol, result))
 
-    
-    changes = []
-    
-    #await interaction.followup.send(f"🔄 Loading price data for {len(stock_symbols)} Aktien...")
 
-    
-    berlin_tz = pytz.timezone("Europe/Berlin")
-    today = datetime.now(berlin_tz).date()
+    # Kennzahlen für die ganze Watchlist in einem NumPy-Durchlauf
+    symbols, stats = await offload.cpu(watchlist_metrics, price_store, list(stock_symbols))
+    changes = change_lines(symbols, stats)
+    movers = movers_text(symbols, stats["return"])
+    metric_lines = metrics_lines(symbols, stats)
 
-    async def fetch_change(symbol):
-        try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="2d")
-            if len(hist) >= 2:
-                y_close = hist["Close"].iloc[-2]
-                t_close = hist["Close"].iloc[-1]
-                delta = t_close - y_close
-                pct = (delta / y_close) * 100
-                return f"{symbol}: {t_close:.2f} EUR ({delta:+.2f}, {pct:+.2f}%)"
-            return f"{symbol}: No price data available."
-        except Exception as e:
-            return f"{symbol}: Fehler – {e}"
+    # Aktuelle Kurse für Preis-Liste (aus demselben Snapshot)
+    prices_today = price_snapshot.price_lines(stock_symbols)
 
-    for symbol in stock_symbols:
-        try:
-            result = await asyncio.wait_for(fetch_change(symbol), timeout=5)
-            changes.append(result)
-        except asyncio.TimeoutError:
-            changes.append(f"{symbol}: ❌ Timeout collecting price data")
-    # NEU innerhalb der Kurs-Abfrage-Schleife
-    ticker = yf.Ticker(symbol)
-    hist = ticker.history(period="2d")
-    ...
-    # Nach der Verarbeitung der Kursveränderung:
-    # Hole aktuellen Kurs für Preis-Liste
-    today_hist = ticker.history(period="1d")
-    if not today_hist.empty:
-        close = today_hist["Close"].iloc[-1]
-        prices_today.append(f"{symbol}: {close:.2f} EUR")
-    else:
-        prices_today.append(f"{symbol}: ❌ No price data")
 
+    news_text = article_store.report_text(today_str())
+    if news_text:
+        articles += "\n\n🗞 News heute:\n" + news_text
 
     combined_text = articles + "\n\n📊 Kursveränderungen heute:\n" + "\n".join(changes)
+    if movers:
+        combined_text += "\n\n" + movers
+    if metric_lines:
+        combined_text += "\n\n📐 Kennzahlen (Spanne, Volatilität, MA, Drawdown):\n" + "\n".join(metric_lines)
 
     # Speichere zusammengefasste Artikel und Kursdaten für späteren Zugriff
-    article_path = f"/opt/stock-bot/articles/{date_str}.txt"
+    article_path = f"{DATA_DIR}/articles/{date_str}.txt"
     os.makedirs(os.path.dirname(article_path), exist_ok=True)
     with open(article_path, "w", encoding="utf-8") as f:
         f.write(combined_text.strip())
@@ -552,28 +623,16 @@ async def manual_report(interaction: discord.Interaction):
     # GPT-Zusammenfassung
     try:
         #await interaction.followup.send("🧠 Creating GPT summary...")
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        safe_input = combined_text[:3000]
-        response = await asyncio.wait_for(
-            asyncio.to_thread(client.chat.completions.create,
-                model="gpt-4.1-nano",
-                messages=[
-                    {"role": "system", "content": "Fasse die folgenden Finanznachrichten und Kursdaten professionell zusammen."},
-                    {"role": "user", "content": safe_input}
-                ]
-            ),
-            timeout=30
+        # Map-Reduce je Symbol statt combined_text[:3000]
+        grouped_news = article_store.by_symbol(today_str(), symbols=list(stock_symbols))
+        sections = {"Artikel": articles}
+        for symbol, change in zip(symbols, changes):
+            lines = [f"{a['title']} ({a['source']})" for a in grouped_news.get(symbol, [])]
+            sections[symbol] = "\n".join(lines + [change])
+        sections["Kennzahlen"] = "\n".join(filter(None, [movers] + metric_lines))
+        summary = await summarizer.summarize(
+            sections, "Fasse die folgenden Finanznachrichten und Kursdaten professionell zusammen."
         )
-        summary = response.choices[0].message.content
-        # 🆕 Speichere die Artikel-Zusammenfassung in Datei
-        article_path = f"/opt/stock-bot/articles/{date_str}.txt"
-        os.makedirs(os.path.dirname(article_path), exist_ok=True)
-        with open(article_path, "w", encoding="utf-8") as f:
-            # Entfernt führende Leerzeichen je Zeile
-            clean_summary = "\n".join(line.lstrip() for line in summary.splitlines())
-            f.write(clean_summary.strip())
-
-
     except asyncio.TimeoutError:
         summary = "⚠️ GPT summary: Timeout"
         send_error_webhook(summary)
@@ -582,8 +641,8 @@ async def manual_report(interaction: discord.Interaction):
         send_error_webhook(summary)
 
     # Daten für spätere Nutzung speichern (Artikel + Preise)
-    article_dir = "/opt/stock-bot/articles"
-    price_dir = "/opt/stock-bot/prices"
+    article_dir = os.path.join(DATA_DIR, "articles")
+    price_dir = os.path.join(DATA_DIR, "prices")
     os.makedirs(article_dir, exist_ok=True)
     os.makedirs(price_dir, exist_ok=True)
 
@@ -596,26 +655,14 @@ async def manual_report(interaction: discord.Interaction):
     with open(os.path.join(price_dir, f"{date_str}.txt"), "w", encoding="utf-8") as f:
         f.write("\n".join(prices_today))
 
-    # PDF generieren
-    
-    html = f"""
-    <html><body>
-        <h1>📈 Aktien-Tagesreport – {date_str}</h1>
-        <h2>🔎 GPT-Zusammenfassung</h2>
-        <p></p>
-        <div style="white-space: pre-wrap; font-family: monospace;">
-        {combined_text}
-        </div>
-        <h2>📈 Kursverläufe heute</h2>
-        {''.join(chart_html_blocks)}
-
-    </body></html>
-    """
-
-    pdf_path = f"/opt/stock-bot/reports/report_{date_str}.pdf"
-    HTML(string=html).write_pdf(pdf_path)
+    # PDF generieren (im Report-Worker, nicht auf dem Event-Loop)
+    pdf_path = f"{DATA_DIR}/reports/report_{date_str}.pdf"
+    await report_renderer.manual(date_str, summary, combined_text, chart_html_blocks, pdf_path)
 
-    await interaction.followup.send(f"📄 **daily report {date_str}**", file=discord.File(pdf_path))
+    message = f"📄 **daily report {date_str}**"
+    if movers:
+        message += "\n" + movers
+    await interaction.followup.send(message, file=discord.File(pdf_path))
 
 
 
@@ -623,7 +670,6 @@ async def manual_report(interaction: discord.Interaction):
 @bot.tree.command(name="liststocks", description="List all currently tracked stock symbols")
 async def liststocks(interaction: discord.Interaction):
     await interaction.response.defer()  # ✅ verhindert Timeout
-    print(load_stocks())
 
     stocks = load_stocks()
     if not stocks:
@@ -633,7 +679,7 @@ async def liststocks(interaction: discord.Interaction):
     msg = "**Tracked symbols:**\n"
     for symbol in stocks:
         name = get_symbol_name(symbol)
-        stock_type = get_symbol_type(symbol)
+        stock_type = get_symbol_type(symbol, stocks)
         msg += f"- {symbol} ({name}) – {stock_type}\n"
 
     await interaction.followup.send(msg)
@@ -645,83 +691,73 @@ async def on_ready():
     print("✅ Bot is online as", bot.user, file=sys.stderr)
     synced = await bot.tree.sync()
     print(f"✅ Slash commands synchronized: {[cmd.name for cmd in synced]}", file=sys.stderr)
-    periodic_news.start()
-    #daily_news.start()
-    check_for_report_time.start()
-    post_daily_stock_graphs.start()
-    weekly_report_scheduler.start()
-
-
-@tasks.loop(minutes=5)
-async def post_daily_stock_graphs():
-    if not is_market_open(): return
-    now = datetime.now()
-    if now.hour == 18 and now.minute < 5:
-        try:
-            stocks = load_stocks()
-            for symbol in stocks:
-                try:
-                    img_path = f"/opt/stock-bot/pngs/{symbol}_chart.png"
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period="7d")
-                    if not hist.empty:
-                        plt.figure(figsize=(6, 3))
-                        plt.plot(hist.index, hist["Close"], marker="o")
-                        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-                        plt.gcf().autofmt_xdate(rotation=45)
-                        plt.title(f"{get_symbol_name(symbol)} ({symbol}) - 7 Day Price")
-                        plt.xlabel("Date")
-                        plt.ylabel("Close Price")
-                        plt.grid(True)
-                        plt.tight_layout()
-                        plt.savefig(img_path)
-                        plt.close()
-
-                        with open(img_path, "rb") as f:
-                            requests.post(os.getenv("STOCK_GRAPH_WEBHOOK_URL"), files={"file": f})
-                except Exception as e:
-                    send_error_webhook(f"📉 Error creating graph for {symbol}: {e}")
-        except Exception as e:
-            send_error_webhook(f"📊 Error in daily stock graph task: {e}")
+    symbol_meta.refresh_in_background(load_stocks())
+    report_renderer.warm_up()
+    scheduler.start()
+
+
+async def post_daily_stock_graphs(scheduled=None):
+    try:
+        # Symbole, deren Börse heute gehandelt hat (Krypto täglich)
+        stocks = market_calendar.traded_symbols(load_stocks(), scheduled)
+        await offload.io(price_snapshot.prefetch, (WEEK,), True)
+        jobs = []
+        for symbol in stocks:
+            hist = price_snapshot.history(symbol, *WEEK)
+            if not hist.empty:
+                img_path = f"{DATA_DIR}/pngs/{symbol}_chart.png"
+                jobs.append(chart_job(symbol, get_symbol_name(symbol), hist, WEEK_SPEC, img_path))
+
+        results = await chart_renderer.render_many(jobs)
+        files = []
+        for job, result in zip(jobs, results):
+            symbol = job["symbol"]
+            if isinstance(result, BaseException):
+                send_error_webhook(f"📉 Error creating graph for {symbol}: {result}", key="📉 Error creating graph")
+            else:
+                files.append((f"{symbol}_chart.png", result))
+        # Bis zu 10 Charts pro Webhook-Nachricht statt einem Request je Symbol
+        webhook_url = os.getenv("STOCK_GRAPH_WEBHOOK_URL")
+        if files and webhook_url:
+            await webhooks.upload_files(webhook_url, files)
+    except Exception as e:
+        send_error_webhook(f"📊 Error in daily stock graph task: {e}")
 
 
 
 
 @bot.tree.command(name="graphs", description="Manually post current stock/ETF 7-day graphs")
-async def manual_post_graphs(interaction: discord.Interaction, format: str = "pdf"):
+async def manual_post_graphs(interaction: discord.Interaction, format: str = "pdf", layout: str = "single"):
     await interaction.response.defer(thinking=True)  # ⏳ Sofortige Antwort an Discord
 
     stocks = load_stocks()
     chart_paths = []
 
     import asyncio
-    async def generate_chart(symbol):
-        try:
-            img_path = f"/opt/stock-bot/pngs/{symbol}_manual_chart.png"
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="7d")
-            if not hist.empty:
-                plt.figure(figsize=(6, 3))
-                plt.plot(hist.index, hist["Close"], marker="o")
-                plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-                plt.gcf().autofmt_xdate(rotation=45)
-                plt.title(f"{get_symbol_name(symbol)} ({symbol}) - 7 Day Price")
-                plt.xlabel("Date")
-                plt.ylabel("Close Price")
-                plt.grid(True)
-                plt.tight_layout()
-                plt.savefig(img_path)
-                plt.close()
-                return symbol, img_path
-        except Exception as e:
-            send_error_webhook(f"📉 Error creating graph for {symbol}: {e}")
-        return symbol, None
+    await offload.io(price_snapshot.prefetch, (WEEK,), True)
 
-    results = await asyncio.gather(*(generate_chart(sym) for sym in stocks))
+    jobs = []
+    for symbol in stocks:
+        hist = price_snapshot.history(symbol, *WEEK)
+        if not hist.empty:
+            img_path = f"{DATA_DIR}/pngs/{symbol}_manual_chart.png"
+            jobs.append(chart_job(symbol, get_symbol_name(symbol), hist, WEEK_SPEC, img_path))
+
+    chart_keys = []
+    if layout == "grid":
+        # Ein Bild mit vielen Panels statt N Einzelbildern
+        results = await chart_renderer.render_grid(jobs, os.path.join(DATA_DIR, "pngs", "graphs_grid_{page}.png"))
+        labels = [f"page {n}" for n in range(1, len(results) + 1)]
+    else:
+        results = await chart_renderer.render_many(jobs)
+        labels = [job["symbol"] for job in jobs]
 
-    for symbol, path in results:
-        if path:
-            chart_paths.append((symbol, path))
+    for label, key, result in zip(labels, content_keys(jobs, grid=layout == "grid"), results):
+        if isinstance(result, BaseException):
+            send_error_webhook(f"📉 Error creating graph for {label}: {result}", key="📉 Error creating graph")
+        else:
+            chart_paths.append((label, result))
+            chart_keys.append(key)
 
     if not chart_paths:
         await interaction.followup.send("⚠️ No charts could be generated.")
@@ -729,16 +765,18 @@ async def manual_post_graphs(interaction: discord.Interaction, format: str = "pd
 
     # PDF erstellen
     
+    # Gleiche Chart-Inhalte -> gleiches PDF aus dem Cache (Pfade sind pro Symbol fest)
+    pdf_key = job_key("graphs_pdf", *chart_keys)
+    final_pdf = await offload.io(chart_renderer.cache.lookup, pdf_key, "pdf")
     try:
-        merger = PdfMerger()
-        for _, path in chart_paths:
-            if Path(path).exists():
-                pdf_path = path.replace(".png", ".pdf")
-                HTML(string=f"<img src='file://{path}' width='600'>").write_pdf(pdf_path)
-                merger.append(pdf_path)
-        final_pdf = "/opt/stock-bot/reports/graphs_report.pdf"
-        merger.write(final_pdf)
-        merger.close()
+        if not final_pdf:
+            # Bilder direkt als PDF-Seiten, ein Schreibvorgang statt N WeasyPrint-Läufen
+            final_pdf = os.path.join(DATA_DIR, "reports", "graphs_report.pdf")
+            with metrics.timer("render_seconds", kind="pdf_graphs"):
+                await offload.cpu(images_to_pdf, [path for _, path in chart_paths], final_pdf)
+            if chart_renderer.cache.enabled:
+                final_pdf = await offload.io(shutil.copyfile, final_pdf, chart_renderer.cache.path_for(pdf_key, "pdf"))
+                await chart_renderer.evict()
     except Exception as e:
         await interaction.followup.send(f"❌ Error creating PDF: {e}")
         return
@@ -747,37 +785,23 @@ async def manual_post_graphs(interaction: discord.Interaction, format: str = "pd
     webhook_url = os.getenv("STOCK_GRAPH_WEBHOOK_URL")
     if webhook_url:
         try:
-            with open(final_pdf, "rb") as f:
-                response = requests.post(webhook_url, files={"file": f})
-                if 200 <= response.status_code < 300:
-                    await interaction.followup.send("📊 Here is the chart report:")
-                else:
-                    await interaction.followup.send(f"⚠️ Error during webhook upload: {response.status_code} {response.text}")
+            (status, text), = await webhooks.upload_files(webhook_url, [("graphs_report.pdf", final_pdf)])
+            if 200 <= status < 300:
+                await interaction.followup.send("📊 Here is the chart report:")
+            else:
+                await interaction.followup.send(f"⚠️ Error during webhook upload: {status} {text}")
         except Exception as e:
             await interaction.followup.send(f"❌ Error sending webhook: {e}")
     else:
         # Wenn kein Webhook gesetzt, sende PDF direkt an Discord
         await interaction.followup.send(
             content="📊 Here is the chart report:",
-            file=discord.File(final_pdf)
+            file=discord.File(final_pdf, filename="graphs_report.pdf")
         )
 
-async def main():
-    print("🚀 Starting Stock-Bot...")
-    async with bot:
-        await bot.start(TOKEN)
-
-if __name__ == "__main__":
-    import asyncio
-    try:
-        asyncio.run(main())
-    except KeyboardInterrupt:
-        send_error_webhook("🛑 Bot was manually stopped.")
-
-async def weekly_report():
-    now = datetime.now(pytz.timezone("Europe/Berlin"))
-    if now.weekday() != 4 or now.hour < 22:
-        return  # Only run Friday evening after 22:00
+async def weekly_report(scheduled=None):
+    # scheduled: fire time, so a caught-up run still covers the week it was due for
+    now = scheduled or datetime.now(MARKET_TIMEZONE)
 
     channel = bot.get_channel(CHANNEL_ID)
     start_date = now - timedelta(days=4)
@@ -786,19 +810,30 @@ async def weekly_report():
     # Load news + prices for Mon–Fri
     weekly_articles = []
     weekly_prices = []
+    weekly_sections = {}
 
+    stocks = load_stocks()
     for date_str in dates:
-        article_path = f"/opt/stock-bot/articles/{date_str}.txt"
-        price_path = f"/opt/stock-bot/prices/{date_str}.txt"
+        article_path = f"{DATA_DIR}/articles/{date_str}.txt"
+        price_path = f"{DATA_DIR}/prices/{date_str}.txt"
 
         if os.path.exists(article_path):
             with open(article_path, "r", encoding="utf-8") as f:
-                weekly_articles.append(f"\n📅 {date_str}\n" + f.read())
-
-        if os.path.exists(price_path):
+                weekly_sections[date_str] = f.read()
+                weekly_articles.append(f"\n📅 {date_str}\n" + weekly_sections[date_str])
+
+        # Kurse aus dem lokalen Time-Series-Store, Textdatei nur als Fallback
+        price_lines = stored_price_lines(date_str, stocks)
+        if price_lines:
+            weekly_prices.append(f"\n📅 {date_str}\n" + "\n".join(price_lines))
+        elif os.path.exists(price_path):
             with open(price_path, "r", encoding="utf-8") as f:
                 weekly_prices.append(f"\n📅 {date_str}\n" + f.read())
 
+    week_changes = stored_week_changes(dates, stocks)
+    if week_changes:
+        weekly_prices.append("\n📊 Week change\n" + "\n".join(week_changes))
+
     full_text = "\n".join(weekly_articles) + "\n\n" + "\n".join(weekly_prices)
 
     if not full_text.strip():
@@ -807,72 +842,160 @@ async def weekly_report():
 
     # Generate GPT summary
     try:
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        response = await asyncio.to_thread(client.chat.completions.create,
-            model="gpt-4.1-nano",
-            messages=[
-                {"role": "system", "content": "Summarize and highlight the main trends of this week's stock market news and price movements."},
-                {"role": "user", "content": full_text[:3000]}
-            ]
+        # Tageszusammenfassungen sind gecacht: unveränderte Tage kosten keinen neuen Call
+        sections = {f"📅 {date_str}": text for date_str, text in weekly_sections.items()}
+        sections["Kurse"] = "\n".join(weekly_prices)
+        summary = await summarizer.summarize(
+            sections,
+            "Summarize and highlight the main trends of this week's stock market news and price movements.",
         )
-        summary = response.choices[0].message.content.strip()
     except Exception as e:
         summary = f"⚠️ GPT error: {e}"
 
     # Build PDF
-    html = f"""
-    <html><body>
-    <h1>📈 Weekly Market Report – Week ending {now.strftime('%Y-%m-%d')}</h1>
-    <h2>🧠 GPT Summary</h2>
-    <p>{summary.replace('\n', '<br>')}</p>
-    <h2>🗞 Weekly News & Price Logs</h2>
-    <div style="white-space: pre-wrap; font-family: monospace;">
-    {full_text}
-    </div>
-    </body></html>
-    """
-    pdf_path = f"/opt/stock-bot/reports/weekly_report_{now.strftime('%Y-%m-%d')}.pdf"
-    HTML(string=html).write_pdf(pdf_path)
+    pdf_path = f"{DATA_DIR}/reports/weekly_report_{now.strftime('%Y-%m-%d')}.pdf"
+    await report_renderer.weekly(now.strftime('%Y-%m-%d'), summary, full_text, pdf_path)
 
     await channel.send(f"📄 **Weekly Report – Week ending {now.strftime('%Y-%m-%d')}**", file=discord.File(pdf_path))
 
 
 async def clear_channel(channel):
-    def not_pinned(msg):
-        return not msg.pinned
-    deleted = await channel.purge(limit=100, check=not_pinned)
-    print(f"{len(deleted)} Messages deleted.")
+    stats = await channel_cleaner.clear(channel)
+    print(format_progress(stats, done=True))
 
 
 
-@tasks.loop(minutes=5)
-async def check_for_report_time():
-    now = datetime.now()
-    report_hour = int(os.getenv("REPORT_HOUR", "22"))
-    print(f"[DEBUG] Report check at {now.strftime('%H:%M')}")
+async def daily_report(scheduled=None):
+    now = scheduled or datetime.now(MARKET_TIMEZONE)
+    day = now.astimezone(timezone.utc).strftime("%Y-%m-%d")
+    channel = bot.get_channel(CHANNEL_ID)
+    text_content = article_store.report_text(day)
 
-    if now.hour == report_hour and now.minute < 5:
-        print("[DEBUG] Report time reached")
-        channel = bot.get_channel(CHANNEL_ID)
-        posted_news = load_posted_news()
+    if not text_content:
+        await channel.send("📭 No news available for today's report.")
+        return
 
-        if not posted_news:
-            await channel.send("📭 No news available for today's report.")
-            return
+    symbols, stats = await offload.cpu(watchlist_metrics, price_store, list(load_stocks()))
+    sections = {}
+    for symbol, items in article_store.by_symbol(day, symbols=symbols).items():
+        sections[symbol] = "\n".join(f"{a['title']} ({a['source']}) {a['link']}" for a in items)
+    movers = movers_text(symbols, stats["return"])
+    if movers:
+        sections["Movers"] = movers
+    date_str = now.strftime("%Y-%m-%d")
+
+    # Generate PDF
+    pdf_file = await generate_daily_report(sections, date_str)
 
-        # Preparing summary
-        text_content = "\n".join(posted_news.keys())
-        date_str = now.strftime("%Y-%m-%d")
+    # Send PDF
+    await channel.send(f"📄 **daily report {date_str}**", file=discord.File(pdf_file))
 
-        # Generate PDF
-        pdf_file = generate_daily_report(text_content, date_str)
+    # Clear channel
+    await clear_channel(channel)
 
-        # Send PDF
-        await channel.send(f"📄 **daily report {date_str}**", file=discord.File(pdf_file))
+    # Drop expired dedup entries (kept for POSTED_NEWS_RETENTION_HOURS)
+    await offload.io(posted_news.evict)
+    clear_posted_pdfs()
 
-        # Clear channel
-        await clear_channel(channel)
 
-        # Reset cache
-        save_posted_news({})
-        clear_posted_pdfs()
+@bot.tree.command(name="schedule", description="Show upcoming scheduled jobs")
+async def show_schedule(interaction: discord.Interaction, count: int = 10):
+    upcoming = scheduler.upcoming(limit=max(1, min(count, 25)))
+    if not upcoming:
+        await interaction.response.send_message("📭 No scheduled jobs.")
+        return
+    msg = f"⏰ **Upcoming jobs** ({MARKET_TIMEZONE})\n"
+    for fire, name in upcoming:
+        job = scheduler.jobs[name]
+        msg += f"- {fire.strftime('%a %Y-%m-%d %H:%M')} – {name} (`{job.cron}`)"
+        if job.last_error:
+            msg += " ⚠️"
+        msg += "\n"
+    await interaction.response.send_message(msg)
+
+
+@bot.tree.command(name="ratelimits", description="Show upstream rate limiter queues and wait times")
+async def show_rate_limits(interaction: discord.Interaction):
+    await interaction.response.send_message("🚦 **Upstream limits**\n```\n" + "\n".join(rate_limit_lines()) + "\n```")
+
+
+@bot.event
+async def on_app_command_completion(interaction, command):
+    observe_command(interaction, "ok")
+
+
+@metrics.collector
+def component_gauges():
+    # Existing stats dicts, read at scrape time
+    cache = chart_renderer.cache
+    yield "cache_hit_ratio", {"cache": "charts"}, hit_rate(cache.hits, cache.misses)
+    yield "cache_hit_ratio", {"cache": "llm"}, hit_rate(summarizer.stats["cache_hits"], summarizer.stats["calls"])
+    yield "cache_hit_ratio", {"cache": "articles"}, hit_rate(article_store.stats["cache_hits"], article_store.stats["fetches"])
+    for component, stats in (("ingest", price_ingestor.stats), ("outbox", outbox.stats), ("webhooks", webhooks.stats),
+                             ("news", news_fetcher.stats), ("llm", summarizer.stats), ("loop", loop_monitor.stats)):
+        for key, value in stats.items():
+            if isinstance(value, (int, float)):
+                yield f"{component}_{key}", {}, value
+    for kind, stats in offload.stats.items():
+        for key, value in stats.items():
+            yield f"offload_{key}", {"pool": kind}, value
+    for name, stats in rate_limit_stats().items():
+        yield "ratelimit_queue_depth", {"upstream": name}, stats["queue_depth"]
+        yield "ratelimit_active", {"upstream": name}, stats["active"]
+        yield "ratelimit_tokens", {"upstream": name}, stats["tokens"]
+        for priority, seconds in stats["wait_seconds"].items():
+            yield "ratelimit_wait_seconds", {"upstream": name, "priority": priority}, seconds
+            yield "ratelimit_granted", {"upstream": name, "priority": priority}, stats["granted_by"][priority]
+
+
+@bot.tree.command(name="metrics", description="Dump bot metrics (Prometheus text format)")
+@app_commands.checks.has_permissions(administrator=True)
+async def dump_metrics(interaction: discord.Interaction):
+    text = metrics.render()
+    summary = "\n".join(metrics.summary_lines("command_")[:15]) or "no commands yet"
+    await interaction.response.send_message(
+        f"📈 **Metrics**\n```\n{summary}\n```",
+        file=discord.File(io.BytesIO(text.encode()), filename="metrics.txt"),
+    )
+
+
+# Zeitpläne (Cron-Syntax in MARKET_TIMEZONE), per Env überschreibbar
+REPORT_HOUR = int(os.getenv("REPORT_HOUR", "22"))
+scheduler.add("periodic_news", os.getenv("SCHEDULE_PERIODIC_NEWS", "*/30 * * * *"), periodic_news, catch_up=False)
+scheduler.add("ingest_prices", os.getenv("SCHEDULE_INGEST_PRICES", "*/15 * * * *"), ingest_prices, catch_up=False)
+scheduler.add("daily_graphs", os.getenv("SCHEDULE_DAILY_GRAPHS", "0 18 * * *"), post_daily_stock_graphs, trading_days=True)
+scheduler.add("daily_report", os.getenv("SCHEDULE_DAILY_REPORT", f"0 {REPORT_HOUR} * * *"), daily_report)
+scheduler.add("weekly_report", os.getenv("SCHEDULE_WEEKLY_REPORT", "0 22 * * fri"), weekly_report)
+scheduler.add("daily_news", os.getenv("SCHEDULE_DAILY_NEWS", "0 22 * * mon-fri"), daily_news,
+              enabled=os.getenv("DAILY_NEWS_ENABLED", "0") == "1")
+
+
+async def main():
+    print("🚀 Starting Stock-Bot...")
+    loop_monitor.start()
+    webhooks.start()
+    try:
+        await metrics_server.start()
+    except OSError as e:
+        print(f"[Metrics] server not started: {e}")
+    try:
+        async with bot:
+            await bot.start(TOKEN)
+    finally:
+        await scheduler.stop()
+        await news_fetcher.close()
+        await outbox.close()
+        await webhooks.close()
+        await metrics_server.stop()
+        chart_renderer.shutdown()
+        report_renderer.shutdown()
+        watchlist_jobs.shutdown(wait=False, cancel_futures=True)
+        loop_monitor.stop()
+        offload.shutdown()
+
+if __name__ == "__main__":
+    import asyncio
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        post_error_webhook("🛑 Bot was manually stopped.")
@@ -0,0 +1,312 @@
+import os
+import json
+import math
+import shutil
+import asyncio
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from metrics import metrics
+
+# Chart rendering with the object-oriented Figure/Agg API (no global pyplot state),
+# executed in a bounded process pool so the event loop never draws itself.
+
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", str(min(4, os.cpu_count() or 1))))
+CHART_DPI = int(os.getenv("CHART_DPI", "100"))
+CHART_GRID_COLUMNS = int(os.getenv("CHART_GRID_COLUMNS", "3"))
+CHART_GRID_PER_PAGE = int(os.getenv("CHART_GRID_PER_PAGE", "12"))
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR", os.path.join(os.getenv("STOCK_BOT_DIR", "/opt/stock-bot"), "cache", "charts"))
+CHART_CACHE_MAX_MB = int(os.getenv("CHART_CACHE_MAX_MB", "200"))  # 0 disables the cache
+
+INTRADAY_SPEC = {
+    "title": "{name} ({symbol}) – Tagesverlauf",
+    "xlabel": "Zeit",
+    "ylabel": "Kurs",
+    "date_format": "%H:%M",
+    "size": (6, 3),
+}
+WEEK_SPEC = {
+    "title": "{name} ({symbol}) - 7 Day Price",
+    "xlabel": "Date",
+    "ylabel": "Close Price",
+    "date_format": "%Y-%m-%d",
+    "size": (6, 3),
+}
+
+
+def chart_job(symbol, name, hist, spec, path):
+    # Plain lists pickle cheaply across the process boundary
+    return {
+        "symbol": symbol,
+        "name": name,
+        "x": list(hist.index.to_pydatetime()),
+        "y": [float(v) for v in hist["Close"]],
+        "spec": spec,
+        "path": path,
+    }
+
+
+def _draw(ax, job, compact=False):
+    spec = job["spec"]
+    ax.plot(job["x"], job["y"], marker="o", markersize=2 if compact else 6)
+    ax.set_title(spec["title"].format(symbol=job["symbol"], name=job["name"]), fontsize=9 if compact else None)
+    if not compact:
+        ax.set_xlabel(spec["xlabel"])
+        ax.set_ylabel(spec["ylabel"])
+    ax.grid(True)
+    ax.xaxis.set_major_formatter(mdates.DateFormatter(spec["date_format"]))
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment("right")
+        if compact:
+            label.set_fontsize(7)
+
+
+def _save(fig, path):
+    # Write to a temp file first so readers never see a half-written image
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.{os.getpid()}.tmp{ext}"
+    fig.savefig(tmp_path, dpi=CHART_DPI)
+    os.replace(tmp_path, path)
+    return path
+
+
+def render_chart(job, path=None):
+    fig = Figure(figsize=job["spec"]["size"])
+    FigureCanvasAgg(fig)
+    _draw(fig.add_subplot(1, 1, 1), job)
+    fig.tight_layout()
+    return _save(fig, path or job["path"])
+
+
+def render_grid(jobs, path, columns=CHART_GRID_COLUMNS):
+    # Many symbols in one multi-panel figure
+    rows = math.ceil(len(jobs) / columns)
+    fig = Figure(figsize=(4 * columns, 2.6 * rows))
+    FigureCanvasAgg(fig)
+    for i, job in enumerate(jobs, 1):
+        _draw(fig.add_subplot(rows, columns, i), job, compact=True)
+    fig.tight_layout()
+    return _save(fig, path)
+
+
+def job_key(*parts):
+    # Content address: drawn series + chart spec + render settings
+    h = hashlib.sha256()
+    for job in parts:
+        if isinstance(job, dict):
+            job = {k: v for k, v in job.items() if k != "path"}
+        h.update(json.dumps(job, sort_keys=True, default=str).encode())
+    h.update(f"dpi={CHART_DPI}".encode())
+    return h.hexdigest()
+
+
+def grid_pages(jobs, per_page=CHART_GRID_PER_PAGE):
+    return [jobs[i:i + per_page] for i in range(0, len(jobs), per_page)]
+
+
+def page_key(jobs):
+    return job_key("grid", CHART_GRID_COLUMNS, *jobs)
+
+
+def content_keys(jobs, grid=False, per_page=CHART_GRID_PER_PAGE):
+    # Content keys of what render_many (one per job) or render_grid (one per page)
+    # produces, in result order. Output paths are fixed per symbol, so anything
+    # derived from rendered charts (e.g. a PDF) must be keyed by these instead
+    if grid:
+        return [page_key(page) for page in grid_pages(jobs, per_page)]
+    return [job_key(job) for job in jobs]
+
+
+class ChartCache:
+    # Size-bounded on-disk LRU of rendered files, keyed by content hash
+    def __init__(self, directory=CHART_CACHE_DIR, max_mb=CHART_CACHE_MAX_MB):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.enabled = max_mb > 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def path_for(self, key, ext="png"):
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def lookup(self, key, ext="png"):
+        if not self.enabled:
+            return None
+        path = self.path_for(key, ext)
+        try:
+            os.utime(path)  # LRU: refresh access time
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def export(self, path, dest):
+        # Make a cached file available under the caller's path: hard link (no copy),
+        # falling back to a copy across filesystems. Returns dest
+        try:
+            if os.path.samefile(path, dest):
+                return dest  # already linked; rename() onto the same inode is a no-op
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        tmp_path = f"{dest}.tmp"
+        try:
+            os.link(path, tmp_path)
+        except FileExistsError:
+            os.unlink(tmp_path)
+            os.link(path, tmp_path)
+        except OSError:
+            shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, dest)
+        return dest
+
+    def evict(self):
+        if not self.enabled:
+            return 0
+        with self._lock:
+            try:
+                entries = [e for e in os.scandir(self.directory) if e.is_file() and ".tmp" not in e.name]
+            except FileNotFoundError:
+                return 0
+            entries.sort(key=lambda e: e.stat().st_mtime)
+            total = sum(e.stat().st_size for e in entries)
+            removed = 0
+            for entry in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    total -= entry.stat().st_size
+                    os.unlink(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            return removed
+
+
+class ChartRenderer:
+    def __init__(self, workers=CHART_WORKERS, cache=None, io=None):
+        # io: coroutine runner for blocking file work (e.g. Offload.io);
+        # defaults to the loop's executor
+        self.workers = workers
+        self.cache = cache or ChartCache()
+        self.io = io
+        self._pool = None
+        self._mp_context = "fork"
+
+    def pool(self):
+        if self._pool is None:
+            # fork starts all workers at once; call start() before any threads exist
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self._mp_context),
+            )
+        return self._pool
+
+    def _reset(self, pool):
+        # Only the first caller seeing this pool break replaces it. By then the
+        # bot runs threads, so the replacement is spawned instead of forked
+        if self._pool is pool:
+            print("[Charts] worker pool broken, restarting")
+            self._pool = None
+            self._mp_context = "spawn"
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def start(self):
+        self.pool().submit(int).result()
+
+    async def _run(self, fn, *args):
+        # A crashed worker breaks the whole pool: replace it and retry once
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = self.pool()
+            try:
+                return await loop.run_in_executor(pool, fn, *args)
+            except BrokenProcessPool:
+                self._reset(pool)
+                if attempt:
+                    raise
+
+    async def _io(self, fn, *args):
+        if self.io is not None:
+            return await self.io(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def evict(self):
+        # Once per batch, after every export, so a batch can't evict its own new entries
+        if self.cache.enabled:
+            await self._io(self.cache.evict)
+
+    async def render(self, job):
+        # Doesn't evict; render_many/render_grid do that once per batch
+        if not self.cache.enabled:
+            with metrics.timer("render_seconds", kind="chart"):
+                return await self._run(render_chart, job)
+        key = job_key(job)
+        cached = await self._io(self.cache.lookup, key)
+        path = cached or self.cache.path_for(key)
+        if not cached:
+            with metrics.timer("render_seconds", kind="chart"):
+                await self._run(render_chart, job, path)
+        if job.get("path"):
+            path = await self._io(self.cache.export, path, job["path"])
+        return path
+
+    async def _render_page(self, jobs, path):
+        if not self.cache.enabled:
+            with metrics.timer("render_seconds", kind="chart_grid"):
+                return await self._run(render_grid, jobs, path)
+        key = page_key(jobs)
+        cached = await self._io(self.cache.lookup, key)
+        if not cached:
+            with metrics.timer("render_seconds", kind="chart_grid"):
+                await self._run(render_grid, jobs, self.cache.path_for(key))
+        return await self._io(self.cache.export, self.cache.path_for(key), path)
+
+    async def render_many(self, jobs, timeout=None):
+        # Results in job order; failed charts come back as exceptions. On timeout
+        # finished charts are kept and only the unfinished ones fail (TimeoutError)
+        tasks = [asyncio.ensure_future(self.render(job)) for job in jobs]
+        if not tasks:
+            return []
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+        finally:
+            for task in tasks:
+                task.cancel()  # no-op for finished tasks
+        await self.evict()
+        results = []
+        for task in tasks:
+            if task in pending:
+                results.append(asyncio.TimeoutError(f"chart not rendered within {timeout}s"))
+            elif task.cancelled():
+                results.append(asyncio.CancelledError())
+            else:
+                results.append(task.exception() or task.result())
+        return results
+
+    async def render_grid(self, jobs, path_pattern, per_page=CHART_GRID_PER_PAGE):
+        # path_pattern gets the page number, e.g. ".../graphs_grid_{page}.png"
+        pages = grid_pages(jobs, per_page)
+        results = await asyncio.gather(
+            *(self._render_page(page, path_pattern.format(page=n)) for n, page in enumerate(pages, 1)),
+            return_exceptions=True,
+        )
+        await self.evict()
+        return results
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+# Channel cleanup: messages younger than 14 days go through bulk delete (100 per
+# call), older ones through paced concurrent single deletes. Pinned messages are
+# kept. Progress is checkpointed per channel so an interrupted run resumes where
+# it stopped instead of re-scanning the whole history.
+
+CLEANUP_STATE_PATH = os.getenv("CLEANUP_STATE_PATH", os.path.join(os.getenv("STOCK_BOT_DIR", "/opt/stock-bot"), "cache", "cleanup_state.json"))
+CLEANUP_CONCURRENCY = int(os.getenv("CLEANUP_CONCURRENCY", "2"))
+CLEANUP_SINGLE_DELAY = float(os.getenv("CLEANUP_SINGLE_DELAY", "0.5"))  # seconds between single deletes per worker
+BULK_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)  # Discord rejects bulk deletes of older messages
+BULK_SIZE = 100
+CHECKPOINT_EVERY = 500  # scanned messages between checkpoints
+
+
+class ChannelCleaner:
+    def __init__(self, state_path=CLEANUP_STATE_PATH, concurrency=CLEANUP_CONCURRENCY, single_delay=CLEANUP_SINGLE_DELAY):
+        self.state_path = state_path
+        self.concurrency = concurrency
+        self.single_delay = single_delay
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _checkpoint(self, channel_id, before_id, stats):
+        state = self._load_state()
+        if before_id is None:
+            state.pop(str(channel_id), None)
+        else:
+            state[str(channel_id)] = {"before": before_id, "stats": stats, "updated": time.time()}
+        self._save_state(state)
+
+    def pending(self, channel_id):
+        return self._load_state().get(str(channel_id))
+
+    async def _delete_single(self, message, semaphore, stats):
+        async with semaphore:
+            try:
+                await message.delete()
+                stats["single"] += 1
+            except discord.NotFound:
+                pass
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"❌ Error while deleting: {e}")
+            await asyncio.sleep(self.single_delay)
+
+    async def _delete_bulk(self, channel, batch, stats):
+        try:
+            if len(batch) == 1:
+                await batch[0].delete()
+            else:
+                await channel.delete_messages(batch)
+            stats["bulk"] += len(batch)
+        except discord.NotFound:
+            pass
+        except Exception as e:
+            stats["failed"] += len(batch)
+            print(f"❌ Error during bulk delete: {e}")
+
+    async def clear(self, channel, limit=None, progress=None, resume=True, progress_every=2.0, keep=()):
+        # progress: optional coroutine function receiving the stats dict
+        # keep: message ids that are never deleted (e.g. the command's own response)
+        stats = {"bulk": 0, "single": 0, "pinned": 0, "failed": 0, "scanned": 0}
+        before = None
+        pending = self.pending(channel.id) if resume else None
+        if pending:
+            before = discord.Object(id=pending["before"])
+            for key, value in pending.get("stats", {}).items():
+                stats[key] = stats.get(key, 0) + value
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        singles = set()
+        batch = []
+        last_report = 0.0
+        oldest_seen = None
+        since_checkpoint = 0
+
+        async def checkpoint():
+            # Everything newer than oldest_seen must be gone before it is recorded,
+            # otherwise a resumed run would skip messages that were never deleted
+            nonlocal batch, since_checkpoint
+            if batch:
+                await self._delete_bulk(channel, batch, stats)
+                batch = []
+            if singles:
+                await asyncio.gather(*singles)
+            self._checkpoint(channel.id, oldest_seen, stats)
+            since_checkpoint = 0
+
+        async def report(force=False):
+            nonlocal last_report
+            if progress and (force or time.monotonic() - last_report >= progress_every):
+                last_report = time.monotonic()
+                try:
+                    await progress(dict(stats))
+                except Exception as e:
+                    print(f"[Cleanup progress error] {e}")
+
+        async for message in channel.history(limit=limit, before=before):
+            stats["scanned"] += 1
+            since_checkpoint += 1
+            oldest_seen = message.id
+            if message.pinned:
+                stats["pinned"] += 1
+            elif message.id in keep:
+                pass
+            elif datetime.now(timezone.utc) - message.created_at < BULK_MAX_AGE:
+                batch.append(message)
+                if len(batch) == BULK_SIZE:
+                    await self._delete_bulk(channel, batch, stats)
+                    batch = []
+            else:
+                task = asyncio.create_task(self._delete_single(message, semaphore, stats))
+                singles.add(task)
+                task.add_done_callback(singles.discard)
+                if len(singles) >= self.concurrency * 4:
+                    await asyncio.wait(singles, return_when=asyncio.FIRST_COMPLETED)
+            if since_checkpoint >= CHECKPOINT_EVERY:
+                await checkpoint()
+            await report()
+
+        if batch:
+            await self._delete_bulk(channel, batch, stats)
+        if singles:
+            await asyncio.gather(*singles)
+        self._checkpoint(channel.id, None, stats)
+        await report(force=True)
+        return stats
+
+
+def format_progress(stats, done=False):
+    deleted = stats["bulk"] + stats["single"]
+    text = f"🧹 {deleted} Messages deleted ({stats['bulk']} bulk, {stats['single']} single"
+    text += f", {stats['pinned']} pinned kept"
+    if stats["failed"]:
+        text += f", {stats['failed']} failed"
+    text += ")"
+    return text if done else text + " …"
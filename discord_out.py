@@ -0,0 +1,174 @@
+import os
+import re
+import time
+import asyncio
+from collections import deque
+
+import discord
+
+# Outbound Discord messages: sections are packed into as few messages (or embeds)
+# as possible without cutting markdown links, and sends are queued per destination
+# with proactive pacing so we stay under the per-channel rate limit.
+
+MESSAGE_LIMIT = 2000
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBED_TOTAL_LIMIT = 6000
+EMBEDS_PER_MESSAGE = 10
+
+DISCORD_NEWS_EMBEDS = os.getenv("DISCORD_NEWS_EMBEDS", "0") == "1"
+CHANNEL_RATE = int(os.getenv("DISCORD_CHANNEL_RATE", "5"))  # messages ...
+CHANNEL_WINDOW = float(os.getenv("DISCORD_CHANNEL_WINDOW", "5"))  # ... per seconds
+
+LINK = re.compile(r"\[[^\]]*\]\([^)]*\)")
+
+
+def _split_line(line, limit):
+    # Split an oversized line on spaces, never inside a [title](url) link.
+    # Link spans are found on the remaining text each round, so stripped
+    # whitespace can't shift them
+    pieces = []
+    while len(line) > limit:
+        cut = line.rfind(" ", 0, limit)
+        for match in reversed([m for m in LINK.finditer(line) if m.start() < limit]):
+            if match.start() < cut < match.end():
+                cut = match.start() - 1
+        if cut <= 0:
+            cut = limit
+        piece = line[:cut].rstrip()
+        if piece:
+            pieces.append(piece)
+        line = line[cut:].lstrip()
+    if line:
+        pieces.append(line)
+    return pieces
+
+
+def pack_sections(sections, limit=MESSAGE_LIMIT, header=None):
+    # Greedy packing: whole sections first, then whole lines, then split lines
+    messages = []
+    current = header or ""
+
+    def add(block, sep):
+        nonlocal current
+        candidate = f"{current}{sep}{block}" if current else block
+        if len(candidate) <= limit:
+            current = candidate
+            return True
+        return False
+
+    for section in sections:
+        if add(section, "\n\n"):
+            continue
+        if current:
+            messages.append(current)
+            current = ""
+        if add(section, ""):
+            continue
+        for line in section.split("\n"):
+            for piece in _split_line(line, limit):
+                if not add(piece, "\n"):
+                    messages.append(current)
+                    current = piece
+    if current:
+        messages.append(current)
+    return messages
+
+
+def pack_embeds(sections, header=None, color=0x2B6CB0):
+    # Up to 10 embeds (4096 chars each, 6000 total) per message
+    descriptions = pack_sections(sections, EMBED_DESCRIPTION_LIMIT)
+    messages, embeds, total = [], [], 0
+    for description in descriptions:
+        if embeds and (len(embeds) == EMBEDS_PER_MESSAGE or total + len(description) > EMBED_TOTAL_LIMIT):
+            messages.append({"embeds": embeds})
+            embeds, total = [], 0
+        embeds.append(discord.Embed(description=description, color=color))
+        total += len(description)
+    if embeds:
+        messages.append({"embeds": embeds})
+    if header and messages:
+        messages[0]["content"] = header
+    return messages
+
+
+class Outbox:
+    def __init__(self, rate=CHANNEL_RATE, window=CHANNEL_WINDOW, use_embeds=DISCORD_NEWS_EMBEDS):
+        self.rate = rate
+        self.window = window
+        self.use_embeds = use_embeds
+        self._queues = {}
+        self._workers = {}
+        self._sent = {}  # destination -> deque of send timestamps
+        self.stats = {"messages": 0, "items": 0, "cycles": 0}
+        self.last_cycle = None
+
+    async def _pace(self, key):
+        sent = self._sent.setdefault(key, deque())
+        now = time.monotonic()
+        while sent and now - sent[0] > self.window:
+            sent.popleft()
+        if len(sent) >= self.rate:
+            await asyncio.sleep(self.window - (now - sent[0]))
+            sent.popleft()
+        sent.append(time.monotonic())
+
+    async def _worker(self, key):
+        # Exits once its queue drains, so one-off destinations (interaction
+        # followups) don't leave a task and queue behind
+        queue = self._queues[key]
+        while not queue.empty():
+            send, kwargs, future = queue.get_nowait()
+            try:
+                await self._pace(key)
+                result = await send(**kwargs)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                queue.task_done()
+        del self._queues[key]
+        del self._workers[key]
+
+    def _prune(self):
+        # Pacing history only matters within the window
+        now = time.monotonic()
+        for key in [k for k, sent in self._sent.items() if k not in self._queues and (not sent or now - sent[-1] > self.window)]:
+            del self._sent[key]
+
+    def _queue(self, key):
+        if key not in self._queues:
+            self._prune()
+            self._queues[key] = asyncio.Queue()
+            self._workers[key] = asyncio.create_task(self._worker(key))
+        return self._queues[key]
+
+    async def send(self, key, send, **kwargs):
+        future = asyncio.get_running_loop().create_future()
+        self._queue(key).put_nowait((send, kwargs, future))
+        return await future
+
+    def pack(self, sections, header=None):
+        if self.use_embeds:
+            return pack_embeds(sections, header)
+        return [{"content": m} for m in pack_sections(sections, header=header)]
+
+    async def deliver(self, key, send, sections, header=None, items=None):
+        # Returns (messages sent, items delivered) for this cycle
+        messages = self.pack(sections, header)
+        for kwargs in messages:
+            await self.send(key, send, **kwargs)
+        items = len(sections) if items is None else items
+        self.stats["messages"] += len(messages)
+        self.stats["items"] += items
+        self.stats["cycles"] += 1
+        self.last_cycle = (len(messages), items)
+        print(f"[Outbox] {key}: {items} items in {len(messages)} messages")
+        return self.last_cycle
+
+    async def close(self):
+        for task in self._workers.values():
+            task.cancel()
+        self._workers.clear()
+        self._queues.clear()
@@ -0,0 +1,82 @@
+import os
+import time
+import threading
+from datetime import datetime, timezone
+
+from prices import _download_batch
+
+# Incremental price ingestion: per symbol and interval, the newest stored bar is the
+# high-water mark and only bars from there on are requested. Symbols sharing the
+# same start day go into one batched download. Downtime gaps close automatically
+# because the request always starts at the last stored bar.
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "50"))
+INGEST_MIN_INTERVAL = int(os.getenv("INGEST_MIN_INTERVAL", "300"))  # seconds between runs per interval
+
+# Initial history for symbols without stored bars (days)
+BACKFILL_DAYS = {"1d": int(os.getenv("INGEST_BACKFILL_DAYS_DAILY", "30")), "intraday": int(os.getenv("INGEST_BACKFILL_DAYS_INTRADAY", "5"))}
+
+# How far back Yahoo serves each interval (days)
+MAX_LOOKBACK = {"1m": 7, "2m": 59, "5m": 59, "15m": 59, "30m": 59, "60m": 729, "1h": 729, "1d": 3650}
+
+
+def _start_day(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class PriceIngestor:
+    def __init__(self, store, batch_size=INGEST_BATCH_SIZE, min_interval=INGEST_MIN_INTERVAL):
+        self.store = store
+        self.batch_size = batch_size
+        self.min_interval = min_interval
+        self._last_run = {}  # interval -> (timestamp, symbols)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "symbols": 0, "bars_added": 0, "errors": 0}
+
+    def plan(self, symbols, interval, now=None):
+        # start day -> symbols that need bars from that day on
+        now = now or time.time()
+        backfill = BACKFILL_DAYS["1d" if interval == "1d" else "intraday"]
+        oldest = now - MAX_LOOKBACK.get(interval, 59) * 86400 + 86400
+        groups = {}
+        for symbol in symbols:
+            hwm = self.store.last_ts(symbol, interval)
+            start = hwm if hwm is not None else now - backfill * 86400
+            groups.setdefault(_start_day(max(start, oldest)), []).append(symbol)
+        return groups
+
+    def ingest(self, interval, symbols, force=False):
+        symbols = sorted(s.upper() for s in symbols)
+        with self._lock:
+            last = self._last_run.get(interval)
+            if not force and last and last[1] == symbols and time.time() - last[0] < self.min_interval:
+                return 0
+            added = 0
+            for start, group in sorted(self.plan(symbols, interval).items()):
+                for i in range(0, len(group), self.batch_size):
+                    added += self._ingest_batch(group[i:i + self.batch_size], start, interval)
+            self._last_run[interval] = (time.time(), symbols)
+            self.stats["bars_added"] += added
+            return added
+
+    def _ingest_batch(self, batch, start, interval):
+        self.stats["requests"] += 1
+        self.stats["symbols"] += len(batch)
+        try:
+            df = _download_batch(batch, None, interval, start=start)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[Ingest error] {interval} {batch[0]}..{batch[-1]}: {e}")
+            return 0
+        added = 0
+        if df.empty:
+            return 0
+        for symbol in batch:
+            if symbol not in df.columns.get_level_values(0):
+                continue
+            try:
+                added += self.store.append_frame(symbol, interval, df[symbol])
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[Price store error] {symbol}/{interval}: {e}")
+        return added
@@ -0,0 +1,239 @@
+import os
+import json
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+import pytz
+
+# Per-exchange trading sessions and holiday calendars. Symbols are mapped to an
+# exchange by Yahoo suffix, cached Yahoo exchange code or stored type (crypto
+# trades 24/7), so polling can be limited to markets that are open or just closed.
+# Rule-based holidays cover the fixed and Easter-based closures; lunar-calendar
+# closures (HKEX, TSE) and ad-hoc ones go into MARKET_HOLIDAYS_FILE.
+
+MARKET_HOLIDAYS_FILE = os.getenv("MARKET_HOLIDAYS_FILE", os.path.join(os.getenv("STOCK_BOT_DIR", "/opt/stock-bot"), "config", "market_holidays.json"))
+MARKET_CLOSE_GRACE = int(os.getenv("MARKET_CLOSE_GRACE", "1800"))  # seconds a market counts as "just closed"
+MARKET_OPEN_LEAD = int(os.getenv("MARKET_OPEN_LEAD", "900"))  # seconds before the open that already count
+
+CRYPTO = "CRYPTO"
+US = "US"
+
+# exchange -> (timezone, open, close)
+SESSIONS = {
+    US: ("America/New_York", time(9, 30), time(16, 0)),
+    "XETRA": ("Europe/Berlin", time(9, 0), time(17, 30)),
+    "FRA": ("Europe/Berlin", time(8, 0), time(22, 0)),
+    "LSE": ("Europe/London", time(8, 0), time(16, 30)),
+    "EURONEXT": ("Europe/Paris", time(9, 0), time(17, 30)),
+    "SIX": ("Europe/Zurich", time(9, 0), time(17, 30)),
+    "MIL": ("Europe/Rome", time(9, 0), time(17, 30)),
+    "HKEX": ("Asia/Hong_Kong", time(9, 30), time(16, 0)),
+    "TSE": ("Asia/Tokyo", time(9, 0), time(15, 30)),
+    "TSX": ("America/Toronto", time(9, 30), time(16, 0)),
+    CRYPTO: ("UTC", time(0, 0), time(0, 0)),
+}
+
+SUFFIXES = {
+    "DE": "XETRA", "F": "FRA", "SG": "FRA", "MU": "FRA", "BE": "FRA", "DU": "FRA", "HM": "FRA",
+    "L": "LSE", "IL": "LSE",
+    "PA": "EURONEXT", "AS": "EURONEXT", "BR": "EURONEXT", "LS": "EURONEXT",
+    "SW": "SIX", "MI": "MIL", "HK": "HKEX", "T": "TSE", "TO": "TSX", "V": "TSX",
+}
+
+# Yahoo "exchange" codes as cached in symbol_meta
+YAHOO_EXCHANGES = {
+    "NMS": US, "NGM": US, "NCM": US, "NYQ": US, "ASE": US, "PCX": US, "BTS": US, "PNK": US, "OQB": US, "OQX": US,
+    "GER": "XETRA", "FRA": "FRA", "STU": "FRA", "MUN": "FRA", "BER": "FRA", "DUS": "FRA", "HAM": "FRA",
+    "LSE": "LSE", "IOB": "LSE", "PAR": "EURONEXT", "AMS": "EURONEXT", "BRU": "EURONEXT", "LIS": "EURONEXT",
+    "EBS": "SIX", "MIL": "MIL", "HKG": "HKEX", "JPX": "TSE", "TOR": "TSX", "VAN": "TSX", "CCC": CRYPTO,
+}
+
+
+def easter(year):
+    # Anonymous Gregorian algorithm
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    # n-th (1-based) weekday of a month, n=-1 for the last one
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed_us(day):
+    # Saturday holidays are observed on Friday, Sunday ones on Monday. A Saturday
+    # New Year's Day is not observed at all: Dec 31 would fall in the prior year,
+    # and NYSE stays open then (e.g. Fri Dec 31, 2021)
+    if day.weekday() == 5 and (day.month, day.day) == (1, 1):
+        return day
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def _observed_uk(day):
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def _rule_holidays(exchange, year):
+    good_friday = easter(year) - timedelta(days=2)
+    easter_monday = easter(year) + timedelta(days=1)
+    if exchange == US:
+        days = {
+            _observed_us(date(year, 1, 1)),
+            _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+            _nth_weekday(year, 2, 0, 3),  # Presidents' Day
+            good_friday,
+            _nth_weekday(year, 5, 0, -1),  # Memorial Day
+            _observed_us(date(year, 7, 4)),
+            _nth_weekday(year, 9, 0, 1),  # Labor Day
+            _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+            _observed_us(date(year, 12, 25)),
+        }
+        if year >= 2022:
+            days.add(_observed_us(date(year, 6, 19)))
+        return days
+    if exchange in ("XETRA", "FRA"):
+        return {date(year, 1, 1), good_friday, easter_monday, date(year, 5, 1),
+                date(year, 12, 24), date(year, 12, 25), date(year, 12, 26), date(year, 12, 31)}
+    if exchange == "LSE":
+        christmas = _observed_uk(date(year, 12, 25))
+        boxing = _observed_uk(christmas + timedelta(days=1))
+        return {_observed_uk(date(year, 1, 1)), good_friday, easter_monday,
+                _nth_weekday(year, 5, 0, 1), _nth_weekday(year, 5, 0, -1), _nth_weekday(year, 8, 0, -1),
+                christmas, boxing}
+    if exchange in ("EURONEXT", "MIL"):
+        return {date(year, 1, 1), good_friday, easter_monday, date(year, 5, 1),
+                date(year, 12, 25), date(year, 12, 26)}
+    if exchange == "SIX":
+        return {date(year, 1, 1), date(year, 1, 2), good_friday, easter_monday, date(year, 5, 1),
+                easter(year) + timedelta(days=39), easter(year) + timedelta(days=50), date(year, 8, 1),
+                date(year, 12, 24), date(year, 12, 25), date(year, 12, 26), date(year, 12, 31)}
+    if exchange == "HKEX":
+        return {date(year, 1, 1), good_friday, easter_monday, date(year, 5, 1), date(year, 7, 1),
+                date(year, 10, 1), date(year, 12, 25), date(year, 12, 26)}
+    if exchange == "TSE":
+        return {date(year, 1, 1), date(year, 1, 2), date(year, 1, 3), date(year, 12, 31)}
+    if exchange == "TSX":
+        victoria = date(year, 5, 24) - timedelta(days=date(year, 5, 24).weekday())  # Monday before May 25
+        christmas = _observed_uk(date(year, 12, 25))
+        boxing = _observed_uk(christmas + timedelta(days=1))
+        return {_observed_uk(date(year, 1, 1)), _nth_weekday(year, 2, 0, 3), good_friday, victoria,
+                _observed_uk(date(year, 7, 1)), _nth_weekday(year, 8, 0, 1), _nth_weekday(year, 9, 0, 1),
+                _nth_weekday(year, 10, 0, 2), christmas, boxing}
+    return set()
+
+
+class MarketCalendar:
+    def __init__(self, holidays_file=MARKET_HOLIDAYS_FILE, grace=MARKET_CLOSE_GRACE, lead=MARKET_OPEN_LEAD, meta=None):
+        self.grace = timedelta(seconds=grace)
+        self.lead = timedelta(seconds=lead)
+        self.meta = meta  # SymbolMetaCache, optional
+        self._extra = self._load_extra(holidays_file)
+        self._holidays = lru_cache(maxsize=256)(self._holidays_for)
+
+    def _load_extra(self, path):
+        # {"HKEX": ["2026-02-17", ...], ...}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠️ Error loading market holidays: {e}")
+            return {}
+        return {ex.upper(): {date.fromisoformat(d) for d in days} for ex, days in data.items()}
+
+    def _holidays_for(self, exchange, year):
+        extra = {d for d in self._extra.get(exchange, ()) if d.year == year}
+        return frozenset(_rule_holidays(exchange, year) | extra)
+
+    def exchange(self, symbol, stock_type=None):
+        symbol = symbol.upper()
+        if (stock_type or "").lower() == "crypto" or symbol.endswith(("-EUR", "-USD", "-USDT", "-BTC")):
+            return CRYPTO
+        if "." in symbol:
+            suffix = symbol.rsplit(".", 1)[1]
+            if suffix in SUFFIXES:
+                return SUFFIXES[suffix]
+        if self.meta is not None:
+            code = (self.meta.get(symbol) or {}).get("exchange", "")
+            if code in YAHOO_EXCHANGES:
+                return YAHOO_EXCHANGES[code]
+        return US
+
+    def is_trading_day(self, exchange, day):
+        if exchange == CRYPTO:
+            return True
+        return day.weekday() < 5 and day not in self._holidays(exchange, day.year)
+
+    def session(self, exchange, day):
+        # (open, close) as aware datetimes in the exchange timezone, None when closed
+        if not self.is_trading_day(exchange, day):
+            return None
+        tz_name, open_t, close_t = SESSIONS[exchange]
+        tz = pytz.timezone(tz_name)
+        if exchange == CRYPTO:
+            start = tz.localize(datetime.combine(day, time(0, 0)))
+            return start, start + timedelta(days=1)
+        return tz.localize(datetime.combine(day, open_t)), tz.localize(datetime.combine(day, close_t))
+
+    def _sessions_around(self, exchange, now):
+        tz = pytz.timezone(SESSIONS[exchange][0])
+        local_day = now.astimezone(tz).date()
+        for day in (local_day - timedelta(days=1), local_day):
+            session = self.session(exchange, day)
+            if session:
+                yield session
+
+    def is_open(self, exchange, now=None):
+        now = now or datetime.now(pytz.utc)
+        return any(start <= now < end for start, end in self._sessions_around(exchange, now))
+
+    def is_active(self, exchange, now=None):
+        # Open, about to open or closed less than `grace` ago
+        now = now or datetime.now(pytz.utc)
+        return any(start - self.lead <= now < end + self.grace for start, end in self._sessions_around(exchange, now))
+
+    def traded_today(self, exchange, now=None):
+        # Today's session (exchange-local) has already opened
+        now = now or datetime.now(pytz.utc)
+        tz = pytz.timezone(SESSIONS[exchange][0])
+        session = self.session(exchange, now.astimezone(tz).date())
+        return session is not None and session[0] <= now
+
+    def _filter(self, symbols, check, now):
+        now = now or datetime.now(pytz.utc)
+        stock_types = symbols if isinstance(symbols, dict) else {}
+        result = {}
+        for symbol in symbols:
+            if check(self.exchange(symbol, stock_types.get(symbol)), now):
+                result[symbol] = stock_types.get(symbol)
+        return result if isinstance(symbols, dict) else list(result)
+
+    def active_symbols(self, symbols, now=None):
+        return self._filter(symbols, self.is_active, now)
+
+    def traded_symbols(self, symbols, now=None):
+        return self._filter(symbols, self.traded_today, now)
+
+    def any_trading_day(self, symbols, day):
+        stock_types = symbols if isinstance(symbols, dict) else {}
+        return any(self.is_trading_day(self.exchange(s, stock_types.get(s)), day) for s in symbols)
@@ -0,0 +1,194 @@
+import os
+import re
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+from aiohttp import web
+
+# In-process metrics: counters and latency histograms keyed by name + labels,
+# plus collectors that turn the existing stats dicts (caches, limiters, pools)
+# into gauges at scrape time. Rendered in Prometheus text format on a local HTTP
+# port (METRICS_PORT, 0 disables) and dumpable through an admin slash command.
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+PREFIX = "stockbot_"
+
+# Seconds; covers cache hits (ms) up to long report runs (minutes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_LABEL_ESCAPE = re.compile(r'(["\\\n])')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in sorted(labels.items()):
+        value = _LABEL_ESCAPE.sub(lambda m: "\\n" if m.group(1) == "\n" else "\\" + m.group(1), str(value))
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    def __init__(self):
+        self._counters = {}  # (name, labels tuple) -> value
+        self._histograms = {}  # (name, labels tuple) -> Histogram
+        self._help = {}
+        self._buckets = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def describe(self, name, text, buckets=None):
+        self._help[name] = text
+        if buckets:
+            self._buckets[name] = buckets
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(self._buckets.get(name, LATENCY_BUCKETS))
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        # Works in sync and async code; adds status="ok"/"error"
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, status=status, **labels)
+
+    @contextmanager
+    def upstream(self, provider, op, symbols=None):
+        # One upstream call: latency, request count by status, batch size
+        if symbols is not None:
+            self.observe("upstream_batch_symbols", symbols, provider=provider, op=op)
+            self.inc("upstream_symbols_total", symbols, provider=provider)
+        with self.timer("upstream_request_seconds", provider=provider, op=op):
+            yield
+
+    def collector(self, fn):
+        # fn() -> iterable of (name, labels dict, value); rendered as gauges
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: (list(h.counts), h.sum, h.count, h.buckets) for k, h in self._histograms.items()}
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {PREFIX}{name} {self._help[name]}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{PREFIX}{name}{_labels(dict(labels))} {value}")
+        for (name, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, n in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += n
+                lines.append(f"{PREFIX}{name}_bucket{_labels(dict(labels, le=bound))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_labels(dict(labels))} {total:.6f}")
+            lines.append(f"{PREFIX}{name}_count{_labels(dict(labels))} {count}")
+        gauges = []
+        for fn in self._collectors:
+            try:
+                gauges.extend(fn())
+            except Exception as e:
+                print(f"[Metrics] collector error: {e}")
+        for name, labels, value in sorted(gauges, key=lambda g: (g[0], sorted(g[1].items()))):
+            if value is None:
+                continue
+            header(name, "gauge")
+            lines.append(f"{PREFIX}{name}{_labels(labels)} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self, prefix=None):
+        # Short human-readable view: count and average per histogram series
+        with self._lock:
+            items = [(k, h.count, h.sum) for k, h in self._histograms.items()]
+        lines = []
+        for (name, labels), count, total in sorted(items):
+            if prefix and not name.startswith(prefix):
+                continue
+            label_text = ",".join(f"{k}={v}" for k, v in labels)
+            lines.append(f"{name}[{label_text}] {count}x avg {total / count:.3f}")
+        return lines
+
+
+def hit_rate(hits, misses):
+    total = hits + misses
+    return hits / total if total else None
+
+
+metrics = Metrics()
+metrics.describe("command_seconds", "Slash command latency")
+metrics.describe("job_seconds", "Scheduled job run time")
+metrics.describe("upstream_request_seconds", "Upstream call latency by provider and operation")
+metrics.describe("upstream_batch_symbols", "Symbols per upstream call", SIZE_BUCKETS)
+metrics.describe("upstream_symbols_total", "Symbols requested from upstream providers")
+metrics.describe("upstream_responses_total", "Upstream HTTP responses by status code")
+metrics.describe("render_seconds", "Chart and PDF render time")
+metrics.describe("cache_hit_ratio", "Cache hits / lookups since start")
+
+
+class MetricsServer:
+    def __init__(self, registry=metrics, host=METRICS_HOST, port=METRICS_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _handle(self, request):
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def start(self):
+        if not self.port or self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"📈 Metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import shutil
+import threading
+
+# Dedup store for posted news: in-memory id -> timestamp, backed by an append-only
+# JSON-lines log. Old entries are evicted by age and the log is compacted with an
+# atomic rename, so a crash never leaves a half-written file behind. Marks made
+# while selecting news are buffered and written with one fsync per flush().
+
+POSTED_NEWS_LOG = os.getenv("POSTED_NEWS_LOG", os.path.join(os.getenv("STOCK_BOT_DIR", "/opt/stock-bot"), "posted_news.log"))
+POSTED_NEWS_RETENTION = int(os.getenv("POSTED_NEWS_RETENTION_HOURS", "48")) * 3600
+LEGACY_POSTED_NEWS_PATH = "posted_news.json"
+LEGACY_POSTED_NEWS_LOG = "posted_news.log"  # old CWD-relative default
+
+
+class PostedNewsStore:
+    def __init__(self, path=POSTED_NEWS_LOG, retention=POSTED_NEWS_RETENTION, legacy_path=LEGACY_POSTED_NEWS_PATH):
+        self.path = path
+        self.retention = retention
+        self._seen = {}
+        self._pending = []  # (id, ts) marked but not yet written
+        self._lock = threading.Lock()
+        if os.path.exists(LEGACY_POSTED_NEWS_LOG) and not os.path.exists(path):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            shutil.move(LEGACY_POSTED_NEWS_LOG, path)
+        self._load()
+        if legacy_path and os.path.exists(legacy_path) and not os.path.exists(path):
+            self._import_legacy(legacy_path)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self._seen[entry["id"]] = entry["ts"]
+                except (ValueError, KeyError, TypeError):
+                    # Torn last line after a crash
+                    continue
+
+    def _import_legacy(self, legacy_path):
+        try:
+            with open(legacy_path, "r") as f:
+                data = json.load(f)
+            now = time.time()
+            with self._lock:
+                for news_id in data:
+                    self._seen.setdefault(news_id, now)
+                self._compact_locked()
+            os.replace(legacy_path, f"{legacy_path}.migrated")
+        except Exception as e:
+            print(f"⚠️ Error importing {legacy_path}: {e}")
+
+    def _append_locked(self, entries):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps({"id": news_id, "ts": ts}) + "\n" for news_id, ts in entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact_locked(self):
+        # Rewrites everything in memory, buffered marks included
+        self._pending.clear()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for news_id, ts in self._seen.items():
+                f.write(json.dumps({"id": news_id, "ts": ts}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def __contains__(self, news_id):
+        with self._lock:
+            return news_id in self._seen
+
+    def __len__(self):
+        with self._lock:
+            return len(self._seen)
+
+    def add(self, news_id, ts=None, flush=True):
+        # Atomic check-and-mark; returns False if the id was already posted.
+        # flush=False only buffers the write (no disk I/O) until flush()
+        ts = ts or time.time()
+        with self._lock:
+            if news_id in self._seen:
+                return False
+            self._seen[news_id] = ts
+            self._pending.append((news_id, ts))
+            if flush:
+                self._flush_locked()
+            return True
+
+    def _flush_locked(self):
+        if self._pending:
+            self._append_locked(self._pending)
+            self._pending.clear()
+
+    def flush(self):
+        # One append + fsync for everything marked since the last flush
+        with self._lock:
+            self._flush_locked()
+
+    def ids(self, since=None):
+        with self._lock:
+            return [news_id for news_id, ts in self._seen.items() if since is None or ts >= since]
+
+    def evict(self, max_age=None):
+        max_age = self.retention if max_age is None else max_age
+        cutoff = time.time() - max_age
+        with self._lock:
+            old = [news_id for news_id, ts in self._seen.items() if ts < cutoff]
+            for news_id in old:
+                del self._seen[news_id]
+            if old:
+                self._compact_locked()
+        return len(old)
@@ -0,0 +1,241 @@
+import os
+import re
+import asyncio
+import random
+
+import aiohttp
+
+from metrics import metrics
+from ratelimit import limiter
+
+# Async Newsdata.io client: one pooled keep-alive session, bounded fan-out across
+# symbols, per-request timeouts and retry with backoff on 429/5xx.
+
+NEWSDATA_URL = os.getenv("NEWSDATA_URL", "https://newsdata.io/api/1/news")
+NEWS_CONCURRENCY = int(os.getenv("NEWS_CONCURRENCY", "5"))
+NEWS_TIMEOUT = float(os.getenv("NEWS_TIMEOUT", "10"))  # seconds per request
+NEWS_RETRIES = int(os.getenv("NEWS_RETRIES", "3"))
+NEWS_BACKOFF = float(os.getenv("NEWS_BACKOFF", "1.0"))  # seconds, doubled per retry
+
+NEWS_QUERY_PACKING = os.getenv("NEWS_QUERY_PACKING", "0") == "1"
+NEWS_QUERY_MAX_LEN = int(os.getenv("NEWS_QUERY_MAX_LEN", "512"))  # Newsdata q limit
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Legal-form suffixes dropped from company names before matching
+NAME_SUFFIXES = re.compile(
+    r"[,.]?\s+(inc|corp|corporation|co|ltd|limited|plc|ag|se|sa|nv|n\.v\.|holdings?|group|ucits etf|etf)\.?$",
+    re.IGNORECASE,
+)
+
+DEFAULT_PARAMS = {
+    "language": "en",
+    "country": "us,de,gb",
+    "category": "business",
+}
+
+
+class NewsFetchError(Exception):
+    pass
+
+
+def _clean_name(name):
+    name = (name or "").strip()
+    while True:
+        stripped = NAME_SUFFIXES.sub("", name).strip()
+        if stripped == name:
+            return name
+        name = stripped
+
+
+def _match_terms(symbol, name):
+    terms = {symbol}
+    base = re.split(r"[.\-]", symbol)[0]
+    if base.isalpha() and len(base) >= 2:
+        terms.add(base)
+    cleaned = _clean_name(name)
+    if cleaned and cleaned.upper() != symbol.upper() and len(cleaned) >= 3:
+        terms.add(cleaned)
+    return terms
+
+
+class QueryPacker:
+    # Packs several symbols into one OR query and maps the returned articles back
+    def __init__(self, name_lookup=None, max_len=NEWS_QUERY_MAX_LEN):
+        self.name_lookup = name_lookup or (lambda s: s)
+        self.max_len = max_len
+        self._patterns = {}
+
+    def _query_terms(self, symbol):
+        terms = [f'"{symbol}"']
+        name = _clean_name(self.name_lookup(symbol))
+        if name and name.upper() != symbol.upper():
+            terms.append(f'"{name}"')
+        return terms
+
+    def pack(self, symbols):
+        packs = []
+        current, current_terms = [], []
+        for symbol in symbols:
+            terms = self._query_terms(symbol)
+            candidate = current_terms + terms
+            if current and len(" OR ".join(candidate)) > self.max_len:
+                packs.append((current, " OR ".join(current_terms)))
+                current, current_terms = [], []
+                candidate = terms
+            if len(" OR ".join(candidate)) > self.max_len:
+                # Name alone would overflow the limit, fall back to the symbol
+                candidate = current_terms + terms[:1]
+            current.append(symbol)
+            current_terms = candidate
+        if current:
+            packs.append((current, " OR ".join(current_terms)))
+        return packs
+
+    def _pattern(self, symbol):
+        pattern = self._patterns.get(symbol)
+        if pattern is None:
+            terms = _match_terms(symbol, self.name_lookup(symbol))
+            alternatives = "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+            pattern = re.compile(rf"(?<![\w$])\$?(?:{alternatives})(?!\w)", re.IGNORECASE)
+            self._patterns[symbol] = pattern
+        return pattern
+
+    def assign(self, symbols, articles):
+        assigned = {s: [] for s in symbols}
+        ambiguous = unmatched = 0
+        for item in articles:
+            text = " ".join(
+                str(item.get(k) or "") for k in ("title", "description", "keywords")
+            )
+            matches = [s for s in symbols if self._pattern(s).search(text)]
+            if not matches:
+                unmatched += 1
+            elif len(matches) > 1:
+                ambiguous += 1
+            for s in matches:
+                assigned[s].append(item)
+        return assigned, ambiguous, unmatched
+
+
+class NewsFetcher:
+    def __init__(self, api_key, concurrency=NEWS_CONCURRENCY, timeout=NEWS_TIMEOUT,
+                 retries=NEWS_RETRIES, backoff=NEWS_BACKOFF, url=NEWSDATA_URL,
+                 packing=NEWS_QUERY_PACKING, name_lookup=None):
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.url = url
+        self.packing = packing
+        self.packer = QueryPacker(name_lookup)
+        self._session = None
+        self._semaphore = None
+        self.stats = {
+            "requests": 0,
+            "symbols": 0,
+            "requests_saved": 0,
+            "articles": 0,
+            "ambiguous_articles": 0,
+            "unmatched_articles": 0,
+            "errors": 0,
+        }
+
+    async def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _limit(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def _delay(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt) + random.uniform(0, self.backoff / 2)
+
+    async def fetch_query(self, query, symbols=1):
+        params = dict(DEFAULT_PARAMS, apikey=self.api_key, q=query)
+        session = await self.session()
+        last_error = None
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                async with self._limit(), limiter("newsdata").slot():
+                    with metrics.upstream("newsdata", "news", symbols):
+                        r = await session.get(self.url, params=params)
+                    metrics.inc("upstream_responses_total", provider="newsdata", code=r.status)
+                    async with r:
+                        if r.status == 200:
+                            data = await r.json(content_type=None)
+                            return data.get("results") or []
+                        if r.status not in RETRY_STATUS:
+                            raise NewsFetchError(f"HTTP {r.status}: {(await r.text())[:200]}")
+                        retry_after = r.headers.get("Retry-After")
+                        last_error = NewsFetchError(f"HTTP {r.status}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+            if attempt < self.retries:
+                await asyncio.sleep(self._delay(attempt, retry_after))
+        raise NewsFetchError(f"{query}: {last_error}")
+
+    # Failed requests yield None instead of a list so callers can tell
+    # "no news" from "couldn't fetch" and retry the symbol later
+
+    async def fetch_symbol(self, symbol):
+        try:
+            return symbol, await self.fetch_query(symbol)
+        except Exception as e:
+            print(f"[Newsdata Error] {symbol}: {e}")
+            self.stats["errors"] += 1
+            return symbol, None
+
+    async def fetch_pack(self, symbols, query):
+        try:
+            articles = await self.fetch_query(query, len(symbols))
+        except Exception as e:
+            print(f"[Newsdata Error] {symbols[0]}..{symbols[-1]}: {e}")
+            self.stats["errors"] += 1
+            return dict.fromkeys(symbols)
+        assigned, ambiguous, unmatched = self.packer.assign(symbols, articles)
+        self.stats["articles"] += len(articles)
+        self.stats["ambiguous_articles"] += ambiguous
+        self.stats["unmatched_articles"] += unmatched
+        return assigned
+
+    async def iter_symbols(self, symbols):
+        # Yields (symbol, articles or None on error) in completion order
+        symbols = list(symbols)
+        if self.packing:
+            packs = self.packer.pack(symbols)
+            tasks = [asyncio.create_task(self.fetch_pack(syms, q)) for syms, q in packs]
+        else:
+            tasks = [asyncio.create_task(self.fetch_symbol(s)) for s in symbols]
+        self.stats["requests"] += len(tasks)
+        self.stats["symbols"] += len(symbols)
+        self.stats["requests_saved"] += len(symbols) - len(tasks)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if self.packing:
+                    for item in result.items():
+                        yield item
+                else:
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Execution layer that keeps blocking work off the event loop: separate bounded
+# thread pools for network I/O, CPU work (numpy/pandas, PDF assembly) and LLM
+# calls, so a burst in one class cannot starve the others. LoopLagMonitor
+# measures how late the loop wakes up and, from a watchdog thread, samples the
+# loop thread's stack while it is stuck, so the blocking call shows up by name.
+
+OFFLOAD_IO_WORKERS = int(os.getenv("OFFLOAD_IO_WORKERS", "16"))
+OFFLOAD_CPU_WORKERS = int(os.getenv("OFFLOAD_CPU_WORKERS", str(os.cpu_count() or 2)))
+OFFLOAD_LLM_WORKERS = int(os.getenv("OFFLOAD_LLM_WORKERS", "4"))
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))  # seconds
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))  # seconds between heartbeats
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Offload:
+    def __init__(self, io_workers=OFFLOAD_IO_WORKERS, cpu_workers=OFFLOAD_CPU_WORKERS, llm_workers=OFFLOAD_LLM_WORKERS):
+        # Threads are created lazily, so building this before the chart fork pool is harmless
+        self.pools = {
+            "io": ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="offload-io"),
+            "cpu": ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="offload-cpu"),
+            "llm": ThreadPoolExecutor(max_workers=llm_workers, thread_name_prefix="offload-llm"),
+        }
+        self.stats = {kind: {"calls": 0, "active": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0} for kind in self.pools}
+        self._lock = threading.Lock()
+
+    def executor(self, kind):
+        return self.pools[kind]
+
+    def _wrap(self, kind, fn, args, kwargs):
+        stats = self.stats[kind]
+
+        def call():
+            started = time.monotonic()
+            with self._lock:
+                stats["active"] += 1
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    stats["errors"] += 1
+                raise
+            finally:
+                elapsed = time.monotonic() - started
+                with self._lock:
+                    stats["active"] -= 1
+                    stats["calls"] += 1
+                    stats["seconds"] += elapsed
+                    stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+
+        return call
+
+    async def run(self, kind, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Carry context variables (e.g. upstream priority) into the worker thread
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self.pools[kind], ctx.run, self._wrap(kind, fn, args, kwargs))
+
+    def io(self, fn, *args, **kwargs):
+        return self.run("io", fn, *args, **kwargs)
+
+    def cpu(self, fn, *args, **kwargs):
+        return self.run("cpu", fn, *args, **kwargs)
+
+    def llm(self, fn, *args, **kwargs):
+        return self.run("llm", fn, *args, **kwargs)
+
+    def submit(self, kind, fn, *args, **kwargs):
+        # Fire and forget, callable from any thread; returns a concurrent Future
+        return self.pools[kind].submit(contextvars.copy_context().run, self._wrap(kind, fn, args, kwargs))
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def describe_stack(frame, depth=3):
+    # "bot.py:671 post_daily_stock_graphs -> sessions.py:589 request": the innermost
+    # project frames plus the innermost frame overall (usually the library call)
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    if not frames:
+        return "unknown"
+    own = [f for f in frames if f.f_code.co_filename.startswith(PROJECT_DIR) and "site-packages" not in f.f_code.co_filename]
+    picked = list(reversed(own[:depth]))
+    if frames[0] not in picked:
+        picked.append(frames[0])
+    return " -> ".join(f"{os.path.basename(f.f_code.co_filename)}:{f.f_lineno} {f.f_code.co_name}" for f in picked)
+
+
+class LoopLagMonitor:
+    def __init__(self, threshold=LOOP_LAG_THRESHOLD, interval=LOOP_LAG_INTERVAL, on_block=None, history=50):
+        self.threshold = threshold
+        self.interval = interval
+        self.on_block = on_block  # callback(lag_seconds, culprit)
+        self.events = deque(maxlen=history)  # (time, lag, culprit)
+        self.stats = {"blocks": 0, "max_lag": 0.0, "last_lag": 0.0}
+        self._beat = time.monotonic()
+        self._culprit = None
+        self._loop_thread = None
+        self._task = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task and not self._task.done():
+            return self._task
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        threading.Thread(target=self._watchdog, name="loop-lag-watchdog", daemon=True).start()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        return self._task
+
+    async def _tick(self):
+        while True:
+            self._beat = time.monotonic()
+            self._culprit = None
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - self._beat - self.interval
+            self.stats["last_lag"] = lag
+            self.stats["max_lag"] = max(self.stats["max_lag"], lag)
+            if lag > self.threshold:
+                self._report(lag, self._culprit or "unknown (not sampled)")
+
+    def _watchdog(self):
+        # Samples the loop thread once per stall, while it is still blocked
+        while not self._stop.wait(self.interval / 2):
+            if self._culprit is None and time.monotonic() - self._beat - self.interval > self.threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                self._culprit = describe_stack(frame)
+
+    def _report(self, lag, culprit):
+        self.stats["blocks"] += 1
+        self.events.append((time.time(), lag, culprit))
+        print(f"[Loop lag] event loop blocked for {lag:.2f}s in {culprit}")
+        if self.on_block:
+            try:
+                self.on_block(lag, culprit)
+            except Exception as e:
+                print(f"[Loop lag] callback error: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
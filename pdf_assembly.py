@@ -0,0 +1,67 @@
+import os
+
+from PIL import Image
+from PyPDF2 import PdfReader, PdfWriter
+
+# Report assembly without a layout engine: chart images become PDF pages directly,
+# existing PDFs are concatenated page by page, and the result is written once.
+# Pillow decodes every image of one save() call up front, so large image sets are
+# written in chunks of PDF_IMAGE_CHUNK pages and merged.
+
+PDF_IMAGE_RESOLUTION = float(os.getenv("PDF_IMAGE_RESOLUTION", "100"))  # dpi of chart PNGs
+PDF_IMAGE_CHUNK = int(os.getenv("PDF_IMAGE_CHUNK", "25"))  # images decoded at once
+
+
+def _rgb_frames(paths):
+    frames = []
+    for path in paths:
+        with Image.open(path) as im:
+            frames.append(im.convert("RGB"))
+    return frames
+
+
+def _write_images(paths, output_path, resolution):
+    frames = _rgb_frames(paths)
+    try:
+        with open(output_path, "wb") as out:
+            frames[0].save(out, "PDF", resolution=resolution, save_all=True, append_images=frames[1:])
+    finally:
+        for frame in frames:
+            frame.close()
+
+
+def images_to_pdf(image_paths, output_path, resolution=PDF_IMAGE_RESOLUTION, chunk=PDF_IMAGE_CHUNK):
+    # One page per image, page size = image size at the given dpi; at most
+    # `chunk` decoded images are held in memory at a time
+    paths = [p for p in image_paths if os.path.exists(p)]
+    if not paths:
+        raise ValueError("No images to assemble")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    chunks = [paths[i:i + chunk] for i in range(0, len(paths), chunk)]
+    if len(chunks) == 1:
+        tmp_path = f"{output_path}.tmp"
+        _write_images(paths, tmp_path, resolution)
+        os.replace(tmp_path, output_path)
+        return output_path
+    parts = [f"{output_path}.part{n}" for n in range(len(chunks))]
+    try:
+        for part, chunk_paths in zip(parts, chunks):
+            _write_images(chunk_paths, part, resolution)
+        return merge_pdfs(parts, output_path)
+    finally:
+        for part in parts:
+            if os.path.exists(part):
+                os.unlink(part)
+
+
+def merge_pdfs(pdf_paths, output_path):
+    writer = PdfWriter()
+    for path in pdf_paths:
+        for page in PdfReader(str(path)).pages:
+            writer.add_page(page)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as out:
+        writer.write(out)
+    os.replace(tmp_path, output_path)
+    return output_path
@@ -0,0 +1,187 @@
+import os
+import time
+import threading
+
+import pandas as pd
+import yfinance as yf
+
+from metrics import metrics
+from ratelimit import limiter
+
+from timeseries import frame_from_bars
+
+# Shared OHLCV snapshot for the whole watchlist.
+# One yf.download per batch of symbols instead of one Ticker().history per symbol.
+
+PRICE_BATCH_SIZE = int(os.getenv("PRICE_BATCH_SIZE", "50"))
+PRICE_SNAPSHOT_TTL = int(os.getenv("PRICE_SNAPSHOT_TTL", "300"))  # seconds
+PRICE_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Windows used by the bot: intraday charts and 7-day graphs/daily changes
+INTRADAY = ("1d", "15m")
+WEEK = ("7d", "1d")
+
+
+def _download_batch(symbols, period, interval, start=None):
+    # One batched yf.download, either a trailing period or everything since start;
+    # shared with the ingestor
+    window = {"start": start} if start is not None else {"period": period}
+    with limiter("yfinance").slot_sync(), metrics.upstream("yfinance", "download", len(symbols)):
+        data = yf.download(
+            symbols,
+            **window,
+            interval=interval,
+            group_by="ticker",
+            auto_adjust=True,
+            threads=True,
+            progress=False,
+        )
+    if data is None or data.empty:
+        return pd.DataFrame()
+    # Single symbol downloads may come back without the ticker level
+    if not isinstance(data.columns, pd.MultiIndex):
+        data = pd.concat({symbols[0]: data}, axis=1)
+    return data
+
+
+def _period_days(period):
+    unit = period[-2:] if period.endswith("mo") else period[-1]
+    count = int(period[:-len(unit)])
+    return count * {"d": 1, "mo": 31, "y": 366}[unit]
+
+
+class PriceSnapshot:
+    def __init__(self, symbols_loader, batch_size=PRICE_BATCH_SIZE, ttl=PRICE_SNAPSHOT_TTL,
+                 store=None, ingestor=None, tz=None):
+        self._load_symbols = symbols_loader
+        self.store = store
+        # With an ingestor, frames are served from the local store after an
+        # incremental update instead of downloading the whole window again
+        self.ingestor = ingestor
+        self.tz = tz
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self._frames = {}  # (period, interval) -> (fetched_at, symbols, DataFrame)
+        self._lock = threading.Lock()
+
+    def _fetch(self, symbols, period, interval):
+        frames = []
+        for i in range(0, len(symbols), self.batch_size):
+            batch = symbols[i:i + self.batch_size]
+            try:
+                df = _download_batch(batch, period, interval)
+                if not df.empty:
+                    frames.append(df)
+            except Exception as e:
+                print(f"[Price snapshot error] {period}/{interval} {batch[0]}..{batch[-1]}: {e}")
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).sort_index()
+
+    def frame(self, period, interval="1d", refresh=False):
+        symbols = sorted(s.upper() for s in self._load_symbols())
+        key = (period, interval)
+        with self._lock:
+            cached = self._frames.get(key)
+            if (
+                not refresh
+                and cached
+                and time.time() - cached[0] < self.ttl
+                and cached[1] == symbols
+            ):
+                metrics.inc("cache_requests_total", cache="price_snapshot", result="hit")
+                return cached[2]
+            metrics.inc("cache_requests_total", cache="price_snapshot", result="miss")
+            if self.ingestor is not None and self.store is not None:
+                if symbols:
+                    self.ingestor.ingest(interval, symbols, force=refresh)
+                df = self._from_store(symbols, period, interval)
+                self._frames[key] = (time.time(), symbols, df)
+                return df
+            df = self._fetch(symbols, period, interval) if symbols else pd.DataFrame()
+            self._frames[key] = (time.time(), symbols, df)
+        self._persist(df, interval)
+        return df
+
+    def _from_store(self, symbols, period, interval):
+        frames = {}
+        start = time.time() - _period_days(period) * 86400
+        for symbol in symbols:
+            lo = int(start)
+            if interval != "1d" and period == "1d":
+                # Intraday "1d" = the latest session (UTC day of the newest bar)
+                last = self.store.last_ts(symbol, interval)
+                if last is None:
+                    continue
+                lo = last - last % 86400
+            bars = self.store.range(symbol, interval, lo)
+            if len(bars):
+                frames[symbol] = frame_from_bars(bars, self.tz)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).sort_index()
+
+    def _persist(self, df, interval):
+        # Keep every downloaded bar in the local time-series store
+        if self.store is None or df.empty:
+            return
+        for symbol in df.columns.get_level_values(0).unique():
+            try:
+                self.store.append_frame(symbol, interval, df[symbol])
+            except Exception as e:
+                print(f"[Price store error] {symbol}/{interval}: {e}")
+
+    def prefetch(self, windows=(INTRADAY, WEEK), refresh=False):
+        for period, interval in windows:
+            self.frame(period, interval, refresh=refresh)
+
+    def invalidate(self):
+        # Marks frames stale (next frame() refetches) but keeps them readable for history().
+        # Swaps the dict without taking the lock, which a running download may hold.
+        # frame() may insert concurrently, so iterate over a snapshot (list() of a
+        # dict view copies it without running Python code in between)
+        items = list(self._frames.items())
+        self._frames = {key: (0, symbols, df) for key, (_, symbols, df) in items}
+
+    def cached(self, period, interval="1d"):
+        # Last fetched frame; never fetches and never waits for a running fetch,
+        # so it is safe to call on the event loop
+        entry = self._frames.get((period, interval))
+        return entry[2] if entry else pd.DataFrame()
+
+    def history(self, symbol, period, interval="1d"):
+        # Only reads what prefetch()/frame() fetched before
+        df = self.cached(period, interval)
+        symbol = symbol.upper()
+        if df.empty or symbol not in df.columns.get_level_values(0):
+            return pd.DataFrame(columns=PRICE_FIELDS)
+        hist = df[symbol]
+        return hist[[c for c in PRICE_FIELDS if c in hist.columns]].dropna(subset=["Close"])
+
+    def daily_change(self, symbol):
+        hist = self.history(symbol, *WEEK)
+        if len(hist) < 2:
+            return None
+        y_close = hist["Close"].iloc[-2]
+        t_close = hist["Close"].iloc[-1]
+        delta = t_close - y_close
+        pct = (delta / y_close) * 100
+        return t_close, delta, pct
+
+    def last_close(self, symbol):
+        hist = self.history(symbol, *WEEK)
+        if hist.empty:
+            return None
+        return hist["Close"].iloc[-1]
+
+    def price_lines(self, symbols=None):
+        if symbols is None:
+            symbols = self._load_symbols()
+        lines = []
+        for symbol in symbols:
+            close = self.last_close(symbol)
+            if close is not None:
+                lines.append(f"{symbol}: {close:.2f} EUR")
+            else:
+                lines.append(f"{symbol}: ❌ No price data")
+        return lines
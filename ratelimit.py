@@ -0,0 +1,193 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager, asynccontextmanager
+
+# Shared token-bucket limiter per upstream (yfinance, Newsdata, OpenAI), used from
+# both coroutines and worker threads. Waiters are served by priority, then in
+# arrival order: slash commands run as INTERACTIVE and overtake queued background
+# jobs. Each limiter also caps in-flight calls and keeps queue/wait statistics.
+# The priority travels with the context (contextvars), including into the offload
+# pools, so call sites only name the upstream.
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+upstream_priority = contextvars.ContextVar("upstream_priority", default=BACKGROUND)
+
+POLL_INTERVAL = 0.05  # seconds; waiters behind the queue head re-check this often
+
+
+def _limits(name, rate, burst, concurrency):
+    # RATE_LIMIT_<NAME>="rate/s,burst,concurrency"
+    value = os.getenv(f"RATE_LIMIT_{name.upper()}")
+    if value:
+        rate, burst, concurrency = (float(v) for v in value.split(","))
+    return float(rate), int(burst), int(concurrency)
+
+
+LIMITS = {
+    "yfinance": _limits("yfinance", 2, 5, 4),
+    "newsdata": _limits("newsdata", 0.5, 5, 5),
+    "openai": _limits("openai", 3, 10, 4),
+}
+
+
+class TokenBucket:
+    def __init__(self, name, rate, burst, concurrency):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._active = 0
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self.stats = {
+            "granted": 0,
+            "active": 0,
+            "queued": {p: 0 for p in PRIORITY_NAMES.values()},
+            "wait_seconds": {p: 0.0 for p in PRIORITY_NAMES.values()},
+            "max_wait": {p: 0.0 for p in PRIORITY_NAMES.values()},
+            "granted_by": {p: 0 for p in PRIORITY_NAMES.values()},
+        }
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _enqueue(self, priority):
+        ticket = (priority, next(self._seq))
+        with self._lock:
+            heapq.heappush(self._waiting, ticket)
+            self.stats["queued"][PRIORITY_NAMES[priority]] += 1
+        return ticket
+
+    def _try_grant(self, ticket, started):
+        # Returns 0 when granted, otherwise seconds until it makes sense to re-check
+        with self._lock:
+            self._refill()
+            if self._waiting[0] == ticket and self._active < self.concurrency and self._tokens >= 1:
+                heapq.heappop(self._waiting)
+                self._tokens -= 1
+                self._active += 1
+                name = PRIORITY_NAMES[ticket[0]]
+                waited = time.monotonic() - started
+                self.stats["granted"] += 1
+                self.stats["active"] = self._active
+                self.stats["queued"][name] -= 1
+                self.stats["granted_by"][name] += 1
+                self.stats["wait_seconds"][name] += waited
+                self.stats["max_wait"][name] = max(self.stats["max_wait"][name], waited)
+                self._changed.notify_all()
+                return 0
+            if self._waiting[0] == ticket and self._active < self.concurrency:
+                return (1 - self._tokens) / self.rate
+            return POLL_INTERVAL
+
+    def _cancel(self, ticket):
+        with self._lock:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self.stats["queued"][PRIORITY_NAMES[ticket[0]]] -= 1
+                self._changed.notify_all()
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+            self.stats["active"] = self._active
+            self._changed.notify_all()
+
+    def acquire_sync(self, priority=None):
+        priority = upstream_priority.get() if priority is None else priority
+        started = time.monotonic()
+        ticket = self._enqueue(priority)
+        try:
+            while True:
+                delay = self._try_grant(ticket, started)
+                if not delay:
+                    return
+                with self._lock:
+                    self._changed.wait(timeout=delay)
+        except BaseException:
+            self._cancel(ticket)
+            raise
+
+    async def acquire(self, priority=None):
+        priority = upstream_priority.get() if priority is None else priority
+        started = time.monotonic()
+        ticket = self._enqueue(priority)
+        try:
+            while True:
+                delay = self._try_grant(ticket, started)
+                if not delay:
+                    return
+                await asyncio.sleep(delay)
+        except BaseException:
+            self._cancel(ticket)
+            raise
+
+    @contextmanager
+    def slot_sync(self, priority=None):
+        self.acquire_sync(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot(self, priority=None):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self):
+        with self._lock:
+            self._refill()
+            stats = {k: (dict(v) if isinstance(v, dict) else v) for k, v in self.stats.items()}
+            stats["tokens"] = round(self._tokens, 2)
+            stats["queue_depth"] = len(self._waiting)
+        stats["avg_wait"] = {
+            p: stats["wait_seconds"][p] / stats["granted_by"][p] if stats["granted_by"][p] else 0.0
+            for p in PRIORITY_NAMES.values()
+        }
+        return stats
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter(name):
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = TokenBucket(name, *LIMITS[name])
+        return _limiters[name]
+
+
+def all_stats():
+    return {name: limiter(name).snapshot() for name in LIMITS}
+
+
+def stats_lines():
+    lines = []
+    for name, s in all_stats().items():
+        lines.append(
+            f"{name}: {s['active']}/{limiter(name).concurrency} active, queue {s['queue_depth']} "
+            f"(i {s['queued']['interactive']} / b {s['queued']['background']}), tokens {s['tokens']}, "
+            f"avg wait i {s['avg_wait']['interactive']:.2f}s / b {s['avg_wait']['background']:.2f}s, "
+            f"max b {s['max_wait']['background']:.1f}s, {s['granted']} calls"
+        )
+    return lines
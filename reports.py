@@ -0,0 +1,125 @@
+import os
+import html
+import time
+import asyncio
+from string import Template
+from concurrent.futures import ThreadPoolExecutor
+
+from weasyprint import HTML, CSS
+try:
+    from weasyprint.text.fonts import FontConfiguration
+except ImportError:  # WeasyPrint < 53
+    from weasyprint.fonts import FontConfiguration
+
+from metrics import metrics
+
+# Report PDFs from precompiled templates. WeasyPrint runs in one dedicated worker
+# thread that keeps the font configuration and the parsed stylesheet warm.
+
+REPORT_CSS = """
+body { font-family: Arial, sans-serif; padding: 20px; }
+h1 { color: #333; }
+p { margin: 10px 0; }
+.log { white-space: pre-wrap; font-family: monospace; }
+img { width: 600px; }
+"""
+
+DAILY_TEMPLATE = Template("""<html><head><meta charset="utf-8"></head><body>
+<h1>📈 Aktien-daily report – $date</h1>
+<p>$summary</p>
+</body></html>""")
+
+MANUAL_TEMPLATE = Template("""<html><head><meta charset="utf-8"></head><body>
+<h1>📈 Aktien-Tagesreport – $date</h1>
+<h2>🔎 GPT-Zusammenfassung</h2>
+<p>$summary</p>
+<div class="log">$data</div>
+<h2>📈 Kursverläufe heute</h2>
+$charts
+</body></html>""")
+
+WEEKLY_TEMPLATE = Template("""<html><head><meta charset="utf-8"></head><body>
+<h1>📈 Weekly Market Report – Week ending $date</h1>
+<h2>🧠 GPT Summary</h2>
+<p>$summary</p>
+<h2>🗞 Weekly News & Price Logs</h2>
+<div class="log">$data</div>
+</body></html>""")
+
+
+def _lines(text):
+    return html.escape(text or "").replace("\n", "<br>")
+
+
+def chart_block(symbol, img_path):
+    return f"<h3>{html.escape(symbol)}</h3><img src='file://{img_path}'>"
+
+
+def chart_error_block(symbol):
+    return f"<p>⚠️ {html.escape(symbol)}: Error creating chart</p>"
+
+
+class ReportRenderer:
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-render")
+        self._fonts = None
+        self._css = None
+        self.timings = {}  # report type -> {"count", "total", "last", "max"} in seconds
+
+    def _warm(self):
+        if self._css is None:
+            self._fonts = FontConfiguration()
+            self._css = CSS(string=REPORT_CSS, font_config=self._fonts)
+
+    def _render_sync(self, kind, document, output_path):
+        self._warm()
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        HTML(string=document).write_pdf(output_path, stylesheets=[self._css], font_config=self._fonts)
+        elapsed = time.perf_counter() - start
+        t = self.timings.setdefault(kind, {"count": 0, "total": 0.0, "last": 0.0, "max": 0.0})
+        t["count"] += 1
+        t["total"] += elapsed
+        t["last"] = elapsed
+        t["max"] = max(t["max"], elapsed)
+        metrics.observe("render_seconds", elapsed, kind=f"pdf_{kind}", status="ok")
+        print(f"[Report] {kind} rendered in {elapsed:.2f}s")
+        return output_path
+
+    def warm_up(self):
+        return self._executor.submit(self._warm)
+
+    async def render(self, kind, document, output_path):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._render_sync, kind, document, output_path)
+
+    async def daily(self, date_str, summary, output_path):
+        document = DAILY_TEMPLATE.substitute(date=date_str, summary=_lines(summary))
+        return await self.render("daily", document, output_path)
+
+    async def manual(self, date_str, summary, data, chart_blocks, output_path):
+        document = MANUAL_TEMPLATE.substitute(
+            date=date_str,
+            summary=_lines(summary),
+            data=html.escape(data or ""),
+            charts="".join(chart_blocks),
+        )
+        return await self.render("manual", document, output_path)
+
+    async def weekly(self, date_str, summary, data, output_path):
+        document = WEEKLY_TEMPLATE.substitute(
+            date=date_str,
+            summary=_lines(summary),
+            data=html.escape(data or ""),
+        )
+        return await self.render("weekly", document, output_path)
+
+    def timing_summary(self):
+        lines = []
+        for kind, t in sorted(self.timings.items()):
+            avg = t["total"] / t["count"] if t["count"] else 0.0
+            lines.append(f"{kind}: {t['count']}x, avg {avg:.2f}s, last {t['last']:.2f}s, max {t['max']:.2f}s")
+        return "\n".join(lines)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
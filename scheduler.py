@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import asyncio
+import inspect
+from datetime import datetime, timedelta
+
+import pytz
+
+from metrics import metrics
+
+# Event-driven job scheduler: every job has a cron-like spec evaluated in the
+# market timezone. The scheduler sleeps until the next fire time instead of
+# polling, and persists the last scheduled time each job ran for, so a run missed
+# during downtime is caught up exactly once after a restart.
+
+SCHEDULER_STATE_PATH = os.getenv("SCHEDULER_STATE_PATH", os.path.join(os.getenv("STOCK_BOT_DIR", "/opt/stock-bot"), "cache", "scheduler_state.json"))
+SCHEDULER_MAX_LATE = int(os.getenv("SCHEDULER_MAX_LATE", "43200"))  # seconds a missed run may be caught up
+MAX_SLEEP = 60  # re-check at least every minute (clock jumps, suspend)
+
+DAY_NAMES = {"sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6}
+MONTH_NAMES = {m: i + 1 for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"])}
+
+
+def _parse_field(field, low, high, names=None):
+    values = set()
+    for part in field.lower().split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/")
+            step = int(step)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (names.get(p) if names and p in names else int(p) for p in part.split("-"))
+        else:
+            start = names.get(part) if names and part in names else int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"Invalid cron field: {field}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class CronSpec:
+    # "minute hour day-of-month month day-of-week", e.g. "0 22 * * mon-fri"
+    def __init__(self, spec):
+        fields = spec.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron spec needs 5 fields: {spec}")
+        self.spec = spec
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = set(_parse_field(fields[2], 1, 31))
+        self.months = set(_parse_field(fields[3], 1, 12, MONTH_NAMES))
+        self.weekdays = {d % 7 for d in _parse_field(fields[4], 0, 7, DAY_NAMES)}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def matches_day(self, day):
+        if day.month not in self.months:
+            return False
+        dom = day.day in self.days
+        dow = (day.weekday() + 1) % 7 in self.weekdays
+        # Cron semantics: restricted day-of-month and day-of-week are OR'ed
+        if self._any_day:
+            return dow
+        if self._any_weekday:
+            return dom
+        return dom or dow
+
+    def next_after(self, after, tz, day_filter=None):
+        # First fire time strictly after `after` (aware datetime), in tz
+        local = after.astimezone(tz)
+        day = local.date()
+        for _ in range(366 * 5):
+            if self.matches_day(day) and (day_filter is None or day_filter(day)):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        fire = tz.localize(datetime(day.year, day.month, day.day, hour, minute))
+                        if fire > after:
+                            return fire
+            day += timedelta(days=1)
+        return None
+
+    def __str__(self):
+        return self.spec
+
+
+def weekdays_only(day):
+    return day.weekday() < 5
+
+
+class Job:
+    def __init__(self, name, spec, func, trading_days=False, catch_up=True, max_late=SCHEDULER_MAX_LATE, enabled=True):
+        self.name = name
+        self.cron = CronSpec(spec)
+        self.func = func
+        self.trading_days = trading_days
+        self.catch_up = catch_up
+        self.max_late = max_late
+        self.enabled = enabled
+        self.next_fire = None
+        self.running = None
+        self.runs = 0
+        self.last_duration = None
+        self.last_error = None
+
+
+class Scheduler:
+    def __init__(self, tz, state_path=SCHEDULER_STATE_PATH, trading_day=weekdays_only, on_error=None):
+        self.tz = pytz.timezone(tz) if isinstance(tz, str) else tz
+        self.state_path = state_path
+        self.trading_day = trading_day  # date -> bool, used by trading_days jobs
+        self.on_error = on_error
+        self.jobs = {}
+        self._state = self._load_state()
+        self._wake = None
+        self._task = None
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _last_run(self, job):
+        value = self._state.get(job.name)
+        return datetime.fromisoformat(value) if value else None
+
+    def _mark(self, job, fire):
+        self._state[job.name] = fire.isoformat()
+        self._save_state()
+
+    def _next(self, job, after):
+        day_filter = self.trading_day if job.trading_days else None
+        return job.cron.next_after(after, self.tz, day_filter)
+
+    def add(self, name, spec, func, **kwargs):
+        job = Job(name, spec, func, **kwargs)
+        self.jobs[name] = job
+        self._plan(job, datetime.now(self.tz))
+        if self._wake:
+            self._wake.set()
+        return job
+
+    def _plan(self, job, now):
+        last = self._last_run(job)
+        if last is None:
+            # First time this job is seen: start from now, nothing to catch up
+            self._mark(job, now)
+            last = now
+        elif not job.catch_up:
+            last = max(last, now)
+        job.next_fire = self._next(job, last)
+
+    def upcoming(self, limit=10, per_job=3):
+        # [(fire time, job name)] over all enabled jobs, soonest first
+        result = []
+        for job in self.jobs.values():
+            fire = job.next_fire if job.enabled else None
+            for _ in range(per_job):
+                if fire is None:
+                    break
+                result.append((fire, job.name))
+                fire = self._next(job, fire)
+        return sorted(result)[:limit]
+
+    def _collapse(self, job, now):
+        # Several missed fire times collapse into the latest one
+        fire = job.next_fire
+        while True:
+            following = self._next(job, fire)
+            if following is None or following > now:
+                return fire
+            fire = following
+
+    async def _run(self, job, fire):
+        started = time.monotonic()
+        try:
+            with metrics.timer("job_seconds", job=job.name):
+                if inspect.signature(job.func).parameters:
+                    await job.func(fire)
+                else:
+                    await job.func()
+            job.last_error = None
+        except Exception as e:
+            job.last_error = str(e)
+            print(f"[Scheduler] {job.name} failed: {e}")
+            if self.on_error:
+                try:
+                    self.on_error(job.name, e)
+                except Exception:
+                    pass
+        finally:
+            job.runs += 1
+            job.last_duration = time.monotonic() - started
+            job.running = None
+
+    def _dispatch(self, job, now):
+        fire = self._collapse(job, now)
+        job.next_fire = self._next(job, fire)
+        # Marked before running: a crash mid-run must not repeat the run on restart
+        self._mark(job, fire)
+        late = (now - fire).total_seconds()
+        if not job.enabled:
+            return
+        if late > job.max_late:
+            print(f"[Scheduler] {job.name}: skipped run for {fire:%Y-%m-%d %H:%M} ({late / 3600:.1f}h late)")
+            return
+        if job.running:
+            print(f"[Scheduler] {job.name}: previous run still active, skipping {fire:%H:%M}")
+            return
+        if late > MAX_SLEEP:
+            print(f"[Scheduler] {job.name}: catching up run for {fire:%Y-%m-%d %H:%M}")
+        job.running = asyncio.create_task(self._run(job, fire))
+
+    async def run(self):
+        self._wake = asyncio.Event()
+        while True:
+            now = datetime.now(self.tz)
+            for job in list(self.jobs.values()):
+                if job.next_fire is not None and job.next_fire <= now:
+                    self._dispatch(job, now)
+            pending = [j.next_fire for j in self.jobs.values() if j.next_fire is not None]
+            delay = MAX_SLEEP
+            if pending:
+                delay = min(max((min(pending) - datetime.now(self.tz)).total_seconds(), 0), MAX_SLEEP)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        tasks = [j.running for j in self.jobs.values() if j.running]
+        if self._task:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
@@ -0,0 +1,166 @@
+import os
+import json
+import asyncio
+import hashlib
+import functools
+
+import openai
+
+from metrics import metrics
+from ratelimit import limiter
+
+# Map-reduce summarization: sections (per symbol, per day) are chunked and
+# summarized concurrently, then reduced into one report within a token budget.
+# Every completion is cached on disk by hash(model + prompt + input), so
+# re-running a report over unchanged input makes no new API calls.
+# OPENAI_BASE_URL points the client at a local stub of the chat-completions API.
+
+LLM_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-nano")
+LLM_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))  # seconds per call
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(os.getenv("STOCK_BOT_DIR", "/opt/stock-bot"), "cache", "llm"))
+LLM_TOKEN_BUDGET = int(os.getenv("LLM_TOKEN_BUDGET", "6000"))  # input tokens per call
+LLM_CHUNK_TOKENS = int(os.getenv("LLM_CHUNK_TOKENS", "1500"))
+
+MAP_PROMPT = "Fasse die folgenden Finanznachrichten und Kursdaten zu {name} knapp und sachlich zusammen."
+REDUCE_GROUP_PROMPT = "Fasse diese Teilzusammenfassungen zusammen, ohne wichtige Details zu verlieren."
+
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for budgeting
+    return len(text) // 4 + 1
+
+
+def chunk_text(text, max_tokens=LLM_CHUNK_TOKENS):
+    chunks, current, size = [], [], 0
+    for line in text.splitlines():
+        tokens = estimate_tokens(line)
+        if tokens > max_tokens:
+            # Single oversized line: hard split
+            step = max_tokens * 4
+            pieces = [line[i:i + step] for i in range(0, len(line), step)]
+        else:
+            pieces = [line]
+        for piece in pieces:
+            tokens = estimate_tokens(piece)
+            if current and size + tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+class Summarizer:
+    def __init__(self, model=LLM_MODEL, base_url=LLM_BASE_URL, concurrency=LLM_CONCURRENCY,
+                 timeout=LLM_TIMEOUT, cache_dir=LLM_CACHE_DIR, budget=LLM_TOKEN_BUDGET,
+                 chunk_tokens=LLM_CHUNK_TOKENS, client=None, executor=None):
+        self.model = model
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.budget = budget
+        self.chunk_tokens = chunk_tokens
+        self._client = client
+        self.executor = executor  # thread pool for the blocking client calls (None: loop default)
+        self._semaphore = None
+        self.stats = {"calls": 0, "cache_hits": 0}
+
+    def client(self):
+        if self._client is None:
+            self._client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=self.base_url)
+        return self._client
+
+    def _limit(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def _cache_path(self, system, user):
+        key = hashlib.sha256(json.dumps([self.model, system, user]).encode()).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _cache_get(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["content"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def _cache_put(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "content": content}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    async def complete(self, system, user):
+        path = self._cache_path(system, user)
+        cached = self._cache_get(path)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+        async with self._limit(), limiter("openai").slot():
+            call = functools.partial(
+                self.client().chat.completions.create,
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": user},
+                ],
+            )
+            with metrics.upstream("openai", "chat"):
+                response = await asyncio.wait_for(
+                    asyncio.get_running_loop().run_in_executor(self.executor, call),
+                    timeout=self.timeout,
+                )
+        self.stats["calls"] += 1
+        content = (response.choices[0].message.content or "").strip()
+        self._cache_put(path, content)
+        return content
+
+    async def _map(self, sections):
+        # Small sections pass through unchanged, large ones are summarized per chunk
+        async def one(name, text):
+            if estimate_tokens(text) <= self.chunk_tokens:
+                return name, text
+            parts = await asyncio.gather(
+                *(self.complete(MAP_PROMPT.format(name=name), chunk) for chunk in chunk_text(text, self.chunk_tokens))
+            )
+            return name, "\n".join(parts)
+
+        return await asyncio.gather(*(one(name, text) for name, text in sections.items() if text.strip()))
+
+    async def _reduce(self, parts, system):
+        blocks = [f"## {name}\n{text}" for name, text in parts]
+        # Tree reduction until everything fits into one call (bounded rounds)
+        for _ in range(4):
+            if estimate_tokens("\n\n".join(blocks)) <= self.budget:
+                break
+            groups, current, size = [], [], 0
+            for block in blocks:
+                tokens = estimate_tokens(block)
+                if current and size + tokens > self.budget:
+                    groups.append(current)
+                    current, size = [], 0
+                current.append(block)
+                size += tokens
+            groups.append(current)
+            blocks = await asyncio.gather(
+                *(self.complete(REDUCE_GROUP_PROMPT, "\n\n".join(g)[: self.budget * 4]) for g in groups)
+            )
+        text = "\n\n".join(blocks)
+        if estimate_tokens(text) > self.budget:
+            text = text[: self.budget * 4]
+        return await self.complete(system, text)
+
+    async def summarize(self, sections, system):
+        # sections: {name: text}; returns one summary for the whole report
+        parts = await self._map(sections)
+        if not parts:
+            return ""
+        return await self._reduce(parts, system)
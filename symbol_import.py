@@ -0,0 +1,69 @@
+import re
+import io
+import csv
+import json
+
+from symbol_meta import symbol_type
+
+# Bulk symbol import/validation: symbols come from a comma list or an attached
+# file (JSON, CSV or one per line), are resolved in batched quote lookups via
+# SymbolMetaCache.resolve and reported as one per-symbol result table.
+
+MAX_IMPORT_SYMBOLS = 1000
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9^][A-Z0-9.\-=^]{0,19}$")
+
+
+def parse_symbols(text):
+    symbols = [s.strip().upper() for s in re.split(r"[,;\s]+", text or "") if s.strip()]
+    return list(dict.fromkeys(symbols))
+
+
+def parse_attachment(data, filename=""):
+    # JSON ({"AAPL": "Stock"} or ["AAPL", ...]), CSV (first column) or plain text
+    text = data.decode("utf-8-sig", errors="replace")
+    if filename.lower().endswith(".json") or text.lstrip().startswith(("{", "[")):
+        parsed = json.loads(text)
+        return parse_symbols(",".join(parsed if isinstance(parsed, list) else parsed.keys()))
+    if filename.lower().endswith(".csv"):
+        rows = [row for row in csv.reader(io.StringIO(text)) if row]
+        if rows and rows[0][0].strip().lower() in ("symbol", "ticker"):
+            rows = rows[1:]
+        return parse_symbols(",".join(row[0] for row in rows))
+    return parse_symbols(text)
+
+
+def split_valid(symbols):
+    # (syntactically valid, rejected)
+    valid = [s for s in symbols if SYMBOL_PATTERN.match(s)]
+    return valid, [s for s in symbols if not SYMBOL_PATTERN.match(s)]
+
+
+def classify(resolved):
+    # {symbol: meta | None | Exception} -> {symbol: (status, type, meta)}
+    rows = {}
+    for symbol, meta in resolved.items():
+        if isinstance(meta, Exception):
+            rows[symbol] = ("error", None, {"name": str(meta)[:40]})
+        elif meta is None:
+            rows[symbol] = ("not found", None, {})
+        elif symbol_type(meta) is None:
+            rows[symbol] = ("unsupported", None, meta)
+        else:
+            rows[symbol] = ("ok", symbol_type(meta), meta)
+    return rows
+
+
+def result_table(rows):
+    # rows: [(symbol, status, type, meta)]
+    lines = [f"{'Symbol':<12} {'Status':<12} {'Type':<7} {'Exch':<5} Name"]
+    for symbol, status, typ, meta in rows:
+        meta = meta or {}
+        lines.append(f"{symbol:<12} {status:<12} {typ or '-':<7} {meta.get('exchange') or '-':<5} {(meta.get('name') or '')[:40]}")
+    return "\n".join(lines)
+
+
+def summary_line(rows):
+    counts = {}
+    for _, status, _, _ in rows:
+        counts[status] = counts.get(status, 0) + 1
+    return ", ".join(f"{n} {status}" for status, n in sorted(counts.items(), key=lambda i: -i[1]))
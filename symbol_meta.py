@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import yfinance as yf
+
+from metrics import metrics
+from ratelimit import limiter, upstream_priority
+
+# Persistent cache for slow yf.Ticker().info lookups (name, quoteType, exchange, currency).
+# Reads never block: missing or stale entries are refreshed in the background.
+
+SYMBOL_META_PATH = os.getenv("SYMBOL_META_PATH", os.path.join(os.getenv("STOCK_BOT_DIR", "/opt/stock-bot"), "cache", "symbol_meta.json"))
+SYMBOL_META_TTL = int(os.getenv("SYMBOL_META_TTL", str(7 * 24 * 3600)))  # seconds
+SYMBOL_META_WORKERS = int(os.getenv("SYMBOL_META_WORKERS", "8"))
+
+SYMBOL_QUOTE_BATCH = int(os.getenv("SYMBOL_QUOTE_BATCH", "50"))  # symbols per v7 quote request
+
+META_FIELDS = ("name", "quoteType", "exchange", "currency")
+QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+
+# Yahoo quoteType -> type stored in stocks.json
+SYMBOL_TYPES = {"EQUITY": "Stock", "ETF": "ETF", "CRYPTOCURRENCY": "Crypto"}
+
+
+def fetch_symbol_meta(symbol, priority=None):
+    with limiter("yfinance").slot_sync(priority), metrics.upstream("yfinance", "info", 1):
+        info = yf.Ticker(symbol).info or {}
+    return {
+        "name": info.get("shortName") or info.get("longName") or symbol,
+        "quoteType": info.get("quoteType", ""),
+        "exchange": info.get("exchange", ""),
+        "currency": info.get("currency", ""),
+    }
+
+
+def fetch_quote_batch(symbols, priority=None):
+    # One quote request for many symbols; unknown symbols are missing from the result
+    from yfinance.data import YfData
+
+    with limiter("yfinance").slot_sync(priority), metrics.upstream("yfinance", "quote", len(symbols)):
+        data = YfData().get_raw_json(QUOTE_URL, params={"symbols": ",".join(symbols), "formatted": "false"})
+    result = ((data or {}).get("quoteResponse") or {}).get("result") or []
+    metas = {}
+    for quote in result:
+        symbol = (quote.get("symbol") or "").upper()
+        if symbol:
+            metas[symbol] = {
+                "name": quote.get("shortName") or quote.get("longName") or symbol,
+                "quoteType": quote.get("quoteType", ""),
+                "exchange": quote.get("exchange", ""),
+                "currency": quote.get("currency", ""),
+            }
+    return metas
+
+
+def symbol_type(meta):
+    return SYMBOL_TYPES.get((meta or {}).get("quoteType", "").upper())
+
+
+class SymbolMetaCache:
+    def __init__(self, path=SYMBOL_META_PATH, ttl=SYMBOL_META_TTL, workers=SYMBOL_META_WORKERS):
+        self.path = path
+        self.ttl = ttl
+        self.workers = workers
+        self._entries = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="symbol-meta")
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._entries = data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Error loading symbol metadata cache: {e}")
+
+    def save(self):
+        # Serialized: resolve() and the background refresh may save at the same time
+        with self._save_lock:
+            with self._lock:
+                data = dict(self._entries)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def _is_stale(self, entry):
+        return entry is None or time.time() - entry.get("fetched_at", 0) > self.ttl
+
+    @staticmethod
+    def _known(entry):
+        # Negative entries (symbol unknown upstream) only carry fetched_at
+        return None if entry and entry.get("unknown") else entry
+
+    def get(self, symbol):
+        symbol = symbol.upper()
+        with self._lock:
+            entry = self._entries.get(symbol)
+        stale = self._is_stale(entry)
+        metrics.inc("cache_requests_total", cache="symbol_meta", result="miss" if stale else "hit")
+        if stale:
+            self.refresh_in_background([symbol])
+        return self._known(entry)
+
+    def get_cached(self, symbol):
+        with self._lock:
+            return self._known(self._entries.get(symbol.upper()))
+
+    def name(self, symbol):
+        entry = self.get(symbol)
+        return (entry or {}).get("name") or symbol
+
+    def quote_type(self, symbol):
+        return (self.get(symbol) or {}).get("quoteType", "")
+
+    def put(self, symbol, meta):
+        entry = {k: meta.get(k, "") for k in META_FIELDS}
+        entry["fetched_at"] = time.time()
+        with self._lock:
+            self._entries[symbol.upper()] = entry
+        return entry
+
+    def put_unknown(self, symbol):
+        # Remembered for one TTL so lookups of unknown symbols don't re-query upstream
+        with self._lock:
+            self._entries[symbol.upper()] = {"unknown": True, "fetched_at": time.time()}
+
+    def evict(self, symbol):
+        with self._lock:
+            self._entries.pop(symbol.upper(), None)
+
+    def refresh(self, symbols, force=False):
+        symbols = [s.upper() for s in symbols]
+        with self._lock:
+            todo = [s for s in symbols if force or self._is_stale(self._entries.get(s))]
+        if not todo:
+            return {}
+
+        updated = {s: self.get_cached(s) for s, m in self.resolve(todo).items() if isinstance(m, dict)}
+        return updated
+
+    def refresh_in_background(self, symbols, force=False):
+        with self._lock:
+            todo = [s.upper() for s in symbols if s.upper() not in self._pending]
+            self._pending.update(todo)
+        if not todo:
+            return None
+
+        def _job():
+            try:
+                self.refresh(todo, force=force)
+            finally:
+                with self._lock:
+                    self._pending.difference_update(todo)
+
+        return self._background.submit(_job)
+
+    def resolve(self, symbols, batch_size=SYMBOL_QUOTE_BATCH):
+        # Live lookup for many symbols: batched quote requests on a bounded pool,
+        # per-symbol .info only for batches that failed as a whole.
+        # Returns {symbol: meta | None (unknown) | Exception}
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+        results = {}
+        # The pool threads don't inherit the caller's context, so pass the priority along
+        priority = upstream_priority.get()
+
+        def _single(symbol):
+            try:
+                meta = fetch_symbol_meta(symbol, priority)
+                return symbol, meta if meta.get("quoteType") else None
+            except Exception as e:
+                return symbol, e
+
+        def _batch(batch):
+            try:
+                found = fetch_quote_batch(batch, priority)
+                return [(s, found.get(s)) for s in batch]
+            except Exception as e:
+                print(f"[Symbol meta error] quote batch {batch[0]}..{batch[-1]}: {e}")
+                return [_single(s) for s in batch]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for pairs in pool.map(_batch, batches):
+                results.update(pairs)
+        found = {s: m for s, m in results.items() if isinstance(m, dict)}
+        unknown = [s for s, m in results.items() if m is None]
+        for symbol, meta in found.items():
+            self.put(symbol, meta)
+        for symbol in unknown:
+            self.put_unknown(symbol)
+        if found or unknown:
+            self.save()
+        return results
@@ -0,0 +1,44 @@
+import asyncio
+import json
+
+from article_store import ArticleStore
+
+
+class FakeFetcher:
+    def __init__(self, results):
+        self.results = results  # symbol -> list of items, or None for a failed request
+
+    async def iter_symbols(self, symbols):
+        for symbol in symbols:
+            yield symbol, self.results[symbol]
+
+
+def _item(title, link="https://news.example/a", when="2026-03-02T10:00:00Z"):
+    return {"title": title, "link": link, "pubDate": when, "source_id": "example"}
+
+
+def test_refresh_writes_buffered_lines_once(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    flushes = []
+    flush = store.flush
+    store.flush = lambda: flushes.append(flush()) or flushes[-1]
+    shared = _item("Both move")
+    fetcher = FakeFetcher({"AAA": [shared, _item("Only A", "https://news.example/b")], "BBB": [shared]})
+
+    added = asyncio.run(store.refresh(["AAA", "BBB"], fetcher))
+
+    assert added == 3
+    assert flushes == [3]
+    lines = [json.loads(line) for line in (tmp_path / "2026-03-02.jsonl").read_text().splitlines()]
+    assert [line["title"] for line in lines] == ["Both move", "Only A", "Both move"]
+    assert lines[-1]["symbols"] == ["AAA", "BBB"]
+    reloaded = ArticleStore(str(tmp_path))
+    assert {a["title"]: a["symbols"] for a in reloaded.articles("2026-03-02")} == {
+        "Both move": ["AAA", "BBB"], "Only A": ["AAA"]}
+
+
+def test_failed_fetch_stays_stale(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    fetcher = FakeFetcher({"AAA": [_item("News")], "BBB": None})
+    asyncio.run(store.refresh(["AAA", "BBB"], fetcher))
+    assert store.stale_symbols(["AAA", "BBB"]) == ["BBB"]
@@ -0,0 +1,113 @@
+import os
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+import pytest
+
+from charts import ChartCache, ChartRenderer, WEEK_SPEC, chart_job, content_keys, job_key
+
+
+def _hist(closes):
+    index = pd.date_range("2026-03-02", periods=len(closes), freq="D")
+    return pd.DataFrame({"Close": closes}, index=index)
+
+
+def _jobs(tmp_path, closes):
+    return [chart_job("AAA", "Alpha", _hist(closes), WEEK_SPEC, str(tmp_path / "pngs" / "AAA_manual_chart.png"))]
+
+
+def test_content_keys_follow_data_not_path(tmp_path):
+    a = _jobs(tmp_path, [1.0, 2.0, 3.0])
+    b = _jobs(tmp_path, [1.0, 2.0, 4.0])
+    assert a[0]["path"] == b[0]["path"]
+    assert content_keys(a) != content_keys(b)
+    assert content_keys(a, grid=True) != content_keys(b, grid=True)
+    assert content_keys(a) == content_keys(_jobs(tmp_path, [1.0, 2.0, 3.0]))
+
+
+def test_pdf_key_changes_with_data(tmp_path):
+    # Same symbol and output path, different series: the graphs PDF must not be reused
+    renderer = ChartRenderer(workers=1, cache=ChartCache(str(tmp_path / "cache"), max_mb=10))
+
+    async def pdf_key(closes):
+        jobs = _jobs(tmp_path, closes)
+        results = await renderer.render_many(jobs)
+        assert results == [jobs[0]["path"]]
+        return job_key("graphs_pdf", *content_keys(jobs))
+
+    try:
+        first = asyncio.run(pdf_key([1.0, 2.0, 3.0]))
+        second = asyncio.run(pdf_key([3.0, 2.0, 1.0]))
+        again = asyncio.run(pdf_key([1.0, 2.0, 3.0]))
+    finally:
+        renderer.shutdown()
+    assert first != second
+    assert first == again
+
+
+class _SlowRenderer(ChartRenderer):
+    # render() without a process pool: sleeps job["delay"] seconds
+    async def render(self, job):
+        await asyncio.sleep(job["delay"])
+        if job.get("fail"):
+            raise ValueError(job["symbol"])
+        return job["symbol"]
+
+
+def test_render_many_timeout_keeps_finished_charts():
+    jobs = [
+        {"symbol": "FAST", "delay": 0},
+        {"symbol": "SLOW", "delay": 5},
+        {"symbol": "BAD", "delay": 0, "fail": True},
+        {"symbol": "QUICK", "delay": 0.01},
+    ]
+    results = asyncio.run(_SlowRenderer(workers=1).render_many(jobs, timeout=0.2))
+    assert results[0] == "FAST"
+    assert isinstance(results[1], asyncio.TimeoutError)
+    assert isinstance(results[2], ValueError)
+    assert results[3] == "QUICK"
+
+
+def test_render_many_without_timeout():
+    jobs = [{"symbol": s, "delay": 0} for s in ("A", "B")]
+    assert asyncio.run(_SlowRenderer(workers=1).render_many(jobs)) == ["A", "B"]
+    assert asyncio.run(_SlowRenderer(workers=1).render_many([])) == []
+
+
+def test_cache_evicted_once_per_batch(tmp_path):
+    class CountingCache(ChartCache):
+        evictions = 0
+
+        def evict(self):
+            CountingCache.evictions += 1
+            return super().evict()
+
+    renderer = ChartRenderer(workers=1, cache=CountingCache(str(tmp_path / "cache"), max_mb=10))
+    jobs = [chart_job(s, s, _hist([1.0, float(i), 3.0]), WEEK_SPEC, str(tmp_path / "pngs" / f"{s}.png"))
+            for i, s in enumerate(("A", "B", "C"))]
+    try:
+        results = asyncio.run(renderer.render_many(jobs))
+    finally:
+        renderer.shutdown()
+    assert results == [job["path"] for job in jobs]
+    assert all((tmp_path / "pngs" / f"{s}.png").exists() for s in ("A", "B", "C"))
+    assert CountingCache.evictions == 1
+
+
+def test_broken_pool_is_replaced(tmp_path):
+    renderer = ChartRenderer(workers=1, cache=ChartCache(str(tmp_path / "cache"), max_mb=0))
+
+    async def run():
+        first = renderer._pool
+        with pytest.raises(BrokenProcessPool):
+            await renderer._run(os._exit, 1)  # kills the worker on both attempts
+        assert renderer._pool is not first
+        path = await renderer.render(_jobs(tmp_path, [1.0, 2.0, 3.0])[0])
+        return path
+
+    try:
+        renderer.start()
+        assert asyncio.run(run()) == str(tmp_path / "pngs" / "AAA_manual_chart.png")
+    finally:
+        renderer.shutdown()
@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from cleanup import ChannelCleaner
+
+
+class FakeMessage:
+    def __init__(self, message_id, channel, age):
+        self.id = message_id
+        self.channel = channel
+        self.pinned = False
+        self.created_at = datetime.now(timezone.utc) - age
+
+    async def delete(self):
+        await asyncio.sleep(0)
+        self.channel.deleted.add(self.id)
+
+
+class FakeChannel:
+    id = 7
+
+    def __init__(self, count, young):
+        # Newest first, like channel.history(); ids above `young` are bulk-deletable
+        self.messages = [FakeMessage(i, self, timedelta(days=1 if i > young else 30)) for i in range(count, 0, -1)]
+        self.deleted = set()
+
+    async def history(self, limit=None, before=None):
+        for message in self.messages:
+            if before is None or message.id < before.id:
+                yield message
+
+    async def delete_messages(self, batch):
+        self.deleted.update(m.id for m in batch)
+
+
+def test_checkpoints_only_cover_deleted_messages(tmp_path):
+    channel = FakeChannel(1200, young=600)
+    cleaner = ChannelCleaner(state_path=str(tmp_path / "state.json"), single_delay=0)
+    checkpoints = []
+    save = cleaner._checkpoint
+
+    def checkpoint(channel_id, before_id, stats):
+        if before_id is not None:
+            # Everything at or newer than the checkpoint must already be gone
+            assert all(i in channel.deleted for i in range(before_id, 1201))
+        checkpoints.append(before_id)
+        save(channel_id, before_id, stats)
+
+    cleaner._checkpoint = checkpoint
+    stats = asyncio.run(cleaner.clear(channel))
+    assert stats["bulk"] == 600 and stats["single"] == 600
+    assert len(channel.deleted) == 1200
+    assert checkpoints[-1] is None and len(checkpoints) > 1
+    assert cleaner.pending(channel.id) is None
@@ -0,0 +1,40 @@
+import random
+
+from discord_out import LINK, _split_line, pack_sections
+
+
+def _links_intact(pieces):
+    return all(piece.count("[") == piece.count("](") for piece in pieces)
+
+
+def test_link_right_after_whitespace_cut():
+    # The cut lands on a run of spaces; the link after it must stay whole
+    line = "a" * 18 + "     " + "[t12 move](https://news.example/12) tail words here"
+    pieces = _split_line(line, 40)
+    assert "[t12 move](https://news.example/12)" in pieces
+    assert _links_intact(pieces)
+    assert all(len(piece) <= 40 for piece in pieces)
+
+
+def test_split_never_breaks_links():
+    rng = random.Random(7)
+    for _ in range(300):
+        words = []
+        for i in range(rng.randint(20, 200)):
+            if rng.random() < 0.3:
+                words.append(f"[t{i} news]({'https://e.example/' + str(i)})")
+            else:
+                words.append("w" * rng.randint(1, 9) + " " * rng.randint(0, 3))
+        line = " ".join(words).strip()
+        pieces = _split_line(line, 120)
+        assert _links_intact(pieces)
+        assert all(len(piece) <= 120 for piece in pieces)
+        assert [m.group(0) for m in LINK.finditer(line)] == [m.group(0) for p in pieces for m in LINK.finditer(p)]
+
+
+def test_pack_sections_respects_limit():
+    sections = [f"**S{i}**\n" + "\n".join(f"🗞️ [title {i}-{j}](https://e.example/{i}/{j})" for j in range(5)) for i in range(40)]
+    messages = pack_sections(sections, limit=300, header="Header")
+    assert messages[0].startswith("Header")
+    assert all(len(m) <= 300 for m in messages)
+    assert _links_intact(messages)
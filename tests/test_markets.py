@@ -0,0 +1,57 @@
+from datetime import date
+
+import pytest
+
+from markets import CRYPTO, US, MarketCalendar
+
+
+@pytest.fixture
+def calendar(tmp_path):
+    return MarketCalendar(holidays_file=str(tmp_path / "none.json"))
+
+
+@pytest.mark.parametrize("day, open_", [
+    (date(2021, 12, 31), True),   # Saturday New Year's Day is not observed on Friday
+    (date(2023, 1, 2), False),    # ...but a Sunday one is observed on Monday
+    (date(2026, 7, 3), False),    # July 4 on a Saturday -> Friday
+    (date(2021, 7, 5), False),    # July 4 on a Sunday -> Monday
+    (date(2026, 6, 19), False),   # Juneteenth
+    (date(2021, 6, 18), True),    # ...only from 2022
+    (date(2026, 11, 26), False),  # Thanksgiving
+    (date(2026, 4, 3), False),    # Good Friday
+])
+def test_us_rules(calendar, day, open_):
+    assert calendar.is_trading_day(US, day) is open_
+
+
+@pytest.mark.parametrize("day, open_", [
+    (date(2026, 5, 18), False),   # Victoria Day: Monday before May 25
+    (date(2025, 5, 19), False),
+    (date(2026, 5, 25), True),
+    (date(2026, 8, 3), False),    # Civic Holiday: first Monday of August
+    (date(2021, 12, 27), False),  # Christmas on Saturday -> Monday
+    (date(2021, 12, 28), False),  # Boxing Day on Sunday -> Tuesday
+    (date(2022, 12, 26), False),  # Christmas on Sunday -> Monday
+    (date(2022, 12, 27), False),  # Boxing Day on Monday -> Tuesday
+    (date(2026, 12, 28), False),  # Boxing Day on Saturday -> Monday
+    (date(2026, 12, 29), True),
+])
+def test_tsx_rules(calendar, day, open_):
+    assert calendar.is_trading_day("TSX", day) is open_
+
+
+def test_lse_christmas_shift(calendar):
+    assert not calendar.is_trading_day("LSE", date(2021, 12, 27))
+    assert not calendar.is_trading_day("LSE", date(2021, 12, 28))
+
+
+def test_crypto_and_weekends(calendar):
+    assert calendar.is_trading_day(CRYPTO, date(2026, 1, 1))
+    assert not calendar.is_trading_day(US, date(2026, 3, 7))
+
+
+def test_exchange_from_suffix(calendar):
+    assert calendar.exchange("SHOP.TO") == "TSX"
+    assert calendar.exchange("SAP.DE") == "XETRA"
+    assert calendar.exchange("BTC-USD") == CRYPTO
+    assert calendar.exchange("AAPL") == US
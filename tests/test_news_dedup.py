@@ -0,0 +1,25 @@
+from news_dedup import PostedNewsStore
+
+
+def test_buffered_marks_are_written_on_flush(tmp_path):
+    path = tmp_path / "posted_news.log"
+    store = PostedNewsStore(str(path), legacy_path=None)
+    assert store.add("a", flush=False)
+    assert not store.add("a", flush=False)
+    assert store.add("b", flush=False)
+    assert not path.exists()
+    store.flush()
+    assert len(path.read_text().splitlines()) == 2
+    assert len(PostedNewsStore(str(path), legacy_path=None)) == 2
+
+
+def test_evict_compacts_including_buffered_marks(tmp_path):
+    path = tmp_path / "posted_news.log"
+    store = PostedNewsStore(str(path), legacy_path=None)
+    store.add("old", ts=1)
+    store.add("new", flush=False)
+    assert store.evict(max_age=3600) == 1
+    store.flush()
+    reloaded = PostedNewsStore(str(path), legacy_path=None)
+    assert "new" in reloaded and "old" not in reloaded
+    assert len(path.read_text().splitlines()) == 1
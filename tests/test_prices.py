@@ -0,0 +1,65 @@
+import threading
+
+import pandas as pd
+
+from prices import PriceSnapshot
+
+
+def _frame(symbols, close):
+    index = pd.date_range("2026-03-02", periods=3, freq="D")
+    return pd.concat({s: pd.DataFrame({"Close": [close] * 3}, index=index) for s in symbols}, axis=1)
+
+
+class CountingSnapshot(PriceSnapshot):
+    def __init__(self, symbols):
+        super().__init__(lambda: symbols)
+        self.fetches = 0
+
+    def _fetch(self, symbols, period, interval):
+        self.fetches += 1
+        return _frame(symbols, float(self.fetches))
+
+
+def test_history_never_fetches():
+    snapshot = CountingSnapshot(["AAA"])
+    assert snapshot.history("AAA", "5d").empty
+    assert snapshot.fetches == 0
+    snapshot.prefetch((("5d", "1d"),))
+    assert snapshot.fetches == 1
+    assert list(snapshot.history("aaa", "5d")["Close"]) == [1.0] * 3
+    assert snapshot.fetches == 1
+
+
+def test_invalidate_keeps_frames_readable_but_stale():
+    snapshot = CountingSnapshot(["AAA"])
+    snapshot.prefetch((("5d", "1d"),))
+    snapshot.invalidate()
+    assert list(snapshot.history("AAA", "5d")["Close"]) == [1.0] * 3
+    snapshot.frame("5d")
+    assert snapshot.fetches == 2
+    assert list(snapshot.history("AAA", "5d")["Close"]) == [2.0] * 3
+
+
+def test_invalidate_while_frames_are_added():
+    snapshot = CountingSnapshot(["AAA"])
+    stop = threading.Event()
+    errors = []
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            snapshot._frames[(f"{n}d", "1d")] = (0, [], pd.DataFrame())
+            n += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(2000):
+            try:
+                snapshot.invalidate()
+            except RuntimeError as e:
+                errors.append(e)
+    finally:
+        stop.set()
+        thread.join()
+    assert not errors
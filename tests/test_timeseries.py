@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from timeseries import BAR_DTYPE, PriceStore, bars_from_frame
+
+
+def _bars(ts, close):
+    bars = np.zeros(len(ts), dtype=BAR_DTYPE)
+    bars["ts"] = ts
+    bars["close"] = close
+    return bars
+
+
+def test_duplicates_in_one_batch_last_write_wins(tmp_path):
+    store = PriceStore(str(tmp_path))
+    n = 64
+    # Every timestamp twice, unsorted; the second occurrence must win
+    ts = np.r_[np.arange(n), np.arange(n)][::-1].copy()
+    close = np.r_[np.zeros(n), np.ones(n)]
+    assert store.append("AAA", "1d", _bars(ts, close)) == n
+    stored = store.bars("AAA", "1d")
+    assert list(stored["ts"]) == list(range(n))
+    assert set(stored["close"]) == {1.0}
+
+
+def test_overlapping_append_merges_and_new_values_win(tmp_path):
+    store = PriceStore(str(tmp_path))
+    assert store.append("AAA", "1d", _bars([10, 20, 30], [1.0, 2.0, 3.0])) == 3
+    assert store.append("AAA", "1d", _bars([30, 40], [3.5, 4.0])) == 1
+    assert store.append("AAA", "1d", _bars([15, 20], [1.5, 2.5])) == 1
+    stored = store.bars("AAA", "1d")
+    assert list(stored["ts"]) == [10, 15, 20, 30, 40]
+    assert list(stored["close"]) == [1.0, 1.5, 2.5, 3.5, 4.0]
+    assert list(store.range("AAA", "1d", 15, 40)["ts"]) == [15, 20, 30]
+
+
+def test_frame_round_trip(tmp_path):
+    store = PriceStore(str(tmp_path))
+    index = pd.date_range("2026-03-02 14:30", periods=3, freq="15min", tz="America/New_York")
+    hist = pd.DataFrame({"Open": [1.0, 2, 3], "High": [1.0, 2, 3], "Low": [1.0, 2, 3],
+                         "Close": [1.0, np.nan, 3], "Volume": [10.0, 20, 30]}, index=index)
+    assert store.append_frame("AAA", "15m", hist) == 2
+    frame = store.frame("AAA", "15m", tz="America/New_York")
+    assert list(frame.index) == [index[0], index[2]]
+    assert list(frame["Close"]) == [1.0, 3.0]
+    assert len(bars_from_frame(hist)) == 2
@@ -0,0 +1,136 @@
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Local columnar OHLCV store: one fixed-width binary file per symbol and interval,
+# sorted by timestamp. Appends go to the end of the file and range reads are
+# memory-mapped numpy views (no copy, no parsing).
+
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", os.path.join(os.getenv("STOCK_BOT_DIR", "/opt/stock-bot"), "prices", "store"))
+
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"),  # epoch seconds, UTC
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+FIELD_MAP = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
+
+
+def _safe(name):
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name)
+
+
+def bars_from_frame(hist):
+    # yfinance-style DataFrame (Open/High/Low/Close/Volume, DatetimeIndex) -> bar array
+    hist = hist.dropna(subset=["Close"])
+    bars = np.zeros(len(hist), dtype=BAR_DTYPE)
+    if not len(hist):
+        return bars
+    index = pd.DatetimeIndex(hist.index)
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    epoch = pd.Timestamp(0, tz="UTC")
+    bars["ts"] = (index.tz_convert("UTC") - epoch) // pd.Timedelta(seconds=1)
+    for src, dst in FIELD_MAP.items():
+        if src in hist.columns:
+            bars[dst] = hist[src].to_numpy(dtype="f8", na_value=np.nan)
+    return bars
+
+
+def frame_from_bars(bars, tz=None):
+    index = pd.to_datetime(bars["ts"], unit="s", utc=True)
+    if tz is not None:
+        index = index.tz_convert(tz)
+    return pd.DataFrame({src: bars[dst] for src, dst in FIELD_MAP.items()}, index=index)
+
+
+class PriceStore:
+    def __init__(self, directory=PRICE_STORE_DIR):
+        self.directory = directory
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.directory, _safe(interval), f"{_safe(symbol.upper())}.bin")
+
+    def _lock(self, symbol, interval):
+        key = (symbol.upper(), interval)
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def bars(self, symbol, interval):
+        path = self._path(symbol, interval)
+        try:
+            # Ignore a torn trailing record after a crash
+            count = os.path.getsize(path) // BAR_DTYPE.itemsize
+        except FileNotFoundError:
+            count = 0
+        if not count:
+            return np.zeros(0, dtype=BAR_DTYPE)
+        return np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+
+    def last_ts(self, symbol, interval):
+        bars = self.bars(symbol, interval)
+        return int(bars["ts"][-1]) if len(bars) else None
+
+    def range(self, symbol, interval, start=None, end=None):
+        # Zero-copy slice of the memory map; start/end are epoch seconds (end exclusive)
+        bars = self.bars(symbol, interval)
+        if not len(bars):
+            return bars
+        ts = bars["ts"]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = len(bars) if end is None else int(np.searchsorted(ts, end, side="left"))
+        return bars[lo:hi]
+
+    def frame(self, symbol, interval, start=None, end=None, tz=None):
+        return frame_from_bars(self.range(symbol, interval, start, end), tz)
+
+    def append(self, symbol, interval, bars):
+        # New bars past the stored tail are appended; bars overlapping the stored
+        # range are merged (deduplicated, new values win) and only the affected
+        # tail of the file is rewritten. Returns the number of added bars.
+        if not len(bars):
+            return 0
+        bars = np.asarray(bars, dtype=BAR_DTYPE)
+        bars = bars[np.argsort(bars["ts"], kind="stable")]  # keeps input order among duplicates
+        _, first = np.unique(bars["ts"][::-1], return_index=True)
+        bars = bars[::-1][first]  # last write wins for duplicate timestamps
+        path = self._path(symbol, interval)
+        with self._lock(symbol, interval):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            existing = self.bars(symbol, interval)
+            if not len(existing) or bars["ts"][0] > existing["ts"][-1]:
+                with open(path, "ab") as f:
+                    f.truncate(len(existing) * BAR_DTYPE.itemsize)
+                    f.write(bars.tobytes())
+                return len(bars)
+            start = int(np.searchsorted(existing["ts"], bars["ts"][0], side="left"))
+            merged = np.concatenate([np.array(existing[start:]), bars])
+            merged = merged[np.argsort(merged["ts"], kind="stable")]
+            keep = np.ones(len(merged), dtype=bool)
+            keep[:-1] = merged["ts"][1:] != merged["ts"][:-1]
+            merged = merged[keep]
+            added = len(merged) - (len(existing) - start)
+            del existing
+            with open(path, "r+b") as f:
+                f.seek(start * BAR_DTYPE.itemsize)
+                f.write(merged.tobytes())
+                f.truncate()
+            return added
+
+    def append_frame(self, symbol, interval, hist):
+        return self.append(symbol, interval, bars_from_frame(hist))
+
+    def symbols(self, interval):
+        try:
+            return sorted(f[:-4] for f in os.listdir(os.path.join(self.directory, _safe(interval))) if f.endswith(".bin"))
+        except FileNotFoundError:
+            return []
@@ -0,0 +1,148 @@
+import os
+import json
+import threading
+
+# The tracked symbols ({"AAPL": "Stock", ...}) held in memory. The file is only
+# re-read when its mtime changes, writes go through a temp file + rename under a
+# lock, and add/remove events let caches and ingestion react to a symbol at once.
+# Edits made to the file by hand are picked up on the next access and published
+# as events as well.
+
+STOCKS_FILE = os.getenv("STOCKS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "stocks.json"))
+
+ADDED = "added"
+REMOVED = "removed"
+
+
+class SymbolRegistry:
+    def __init__(self, path=STOCKS_FILE):
+        self.path = path
+        self._symbols = {}
+        self._mtime = None
+        self._lock = threading.RLock()
+        self._listeners = []
+        with self._lock:
+            self._reload(notify=False)
+
+    def subscribe(self, callback):
+        # callback(event, symbol, symbol_type), event is ADDED or REMOVED
+        self._listeners.append(callback)
+        return callback
+
+    def _publish(self, events):
+        for event, symbol, symbol_type in events:
+            for callback in self._listeners:
+                try:
+                    callback(event, symbol, symbol_type)
+                except Exception as e:
+                    print(f"[Watchlist] listener error for {event} {symbol}: {e}")
+
+    def _read(self):
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return {s.upper(): t for s, t in data.items()}
+        if isinstance(data, list):
+            return {s.upper(): "Unknown" for s in data if isinstance(s, str)}
+        raise ValueError("stock list must be a JSON object or list")
+
+    def _reload(self, notify=True):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return []
+        try:
+            symbols = self._read() if mtime is not None else {}
+        except Exception as e:
+            # Keep the last good list while the file is broken
+            print(f"⚠️ Error loading stock list: {e}")
+            return []
+        events = self._diff(self._symbols, symbols)
+        self._symbols = symbols
+        self._mtime = mtime
+        return events if notify else []
+
+    @staticmethod
+    def _diff(old, new):
+        events = [(ADDED, s, t) for s, t in new.items() if s not in old]
+        events += [(REMOVED, s, t) for s, t in old.items() if s not in new]
+        return events
+
+    def _write(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._symbols, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def all(self):
+        with self._lock:
+            events = self._reload()
+            symbols = dict(self._symbols)
+        self._publish(events)
+        return symbols
+
+    def symbols(self):
+        return list(self.all())
+
+    def get(self, symbol, default=None):
+        return self.all().get(symbol.upper(), default)
+
+    def __contains__(self, symbol):
+        return symbol.upper() in self.all()
+
+    def __len__(self):
+        return len(self.all())
+
+    def update(self, added=None, removed=()):
+        # Atomic read-modify-write; returns (added, removed) as actually applied
+        with self._lock:
+            events = self._reload()
+            applied_add = {s.upper(): t for s, t in (added or {}).items() if s.upper() not in self._symbols}
+            applied_remove = [s.upper() for s in removed if s.upper() in self._symbols]
+            if applied_add or applied_remove:
+                new = dict(self._symbols)
+                new.update(applied_add)
+                for symbol in applied_remove:
+                    del new[symbol]
+                events += self._diff(self._symbols, new)
+                self._symbols = new
+                self._write()
+        self._publish(events)
+        return applied_add, applied_remove
+
+    def add(self, symbol, symbol_type):
+        added, _ = self.update(added={symbol: symbol_type})
+        return bool(added)
+
+    def remove(self, symbol):
+        _, removed = self.update(removed=[symbol])
+        return bool(removed)
+
+    def set_types(self, types):
+        # Change types of existing symbols without add/remove events
+        with self._lock:
+            events = self._reload()
+            changed = {s.upper(): t for s, t in types.items() if self._symbols.get(s.upper()) not in (None, t)}
+            if changed:
+                self._symbols.update(changed)
+                self._write()
+        self._publish(events)
+        return changed
+
+    def replace(self, symbols):
+        # Make the list equal to `symbols`; returns (added, removed)
+        symbols = {s.upper(): t for s, t in symbols.items()}
+        with self._lock:
+            current = self.all()
+            added, removed = self.update(
+                added={s: t for s, t in symbols.items() if s not in current},
+                removed=[s for s in current if s not in symbols],
+            )
+            self.set_types(symbols)
+        return added, removed
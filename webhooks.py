@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import asyncio
+import threading
+
+import aiohttp
+
+# Async Discord webhook dispatcher: one pooled session, a bounded queue drained by
+# a single worker that honours webhook rate limits, error-storm coalescing (the
+# first error of a kind goes out at once, repeats within the window are folded
+# into one summary with counts) and multi-file uploads packed into as few
+# multipart requests as the attachment limits allow.
+
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "200"))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "30"))  # seconds per request
+WEBHOOK_RETRIES = int(os.getenv("WEBHOOK_RETRIES", "3"))
+ERROR_COALESCE_WINDOW = float(os.getenv("ERROR_COALESCE_WINDOW", "60"))  # seconds
+WEBHOOK_MAX_FILES = 10  # attachments per message
+WEBHOOK_MAX_UPLOAD = int(os.getenv("WEBHOOK_MAX_UPLOAD", str(25 * 1024 * 1024)))  # bytes per message
+
+MESSAGE_LIMIT = 2000
+MAX_SAMPLES = 10
+
+
+class WebhookError(Exception):
+    pass
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def file_batches(files, max_files=WEBHOOK_MAX_FILES, max_bytes=WEBHOOK_MAX_UPLOAD):
+    # [(filename, path)] -> batches within the per-message file count and size limits
+    batches, current, size = [], [], 0
+    for filename, path in files:
+        file_size = os.path.getsize(path)
+        if current and (len(current) == max_files or size + file_size > max_bytes):
+            batches.append(current)
+            current, size = [], 0
+        current.append((filename, path))
+        size += file_size
+    if current:
+        batches.append(current)
+    return batches
+
+
+class WebhookDispatcher:
+    def __init__(self, queue_size=WEBHOOK_QUEUE_SIZE, timeout=WEBHOOK_TIMEOUT, retries=WEBHOOK_RETRIES,
+                 window=ERROR_COALESCE_WINDOW, fallback=None, io=None):
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retries = retries
+        self.window = window
+        self.fallback = fallback  # sync (url, content) poster used before start/after close
+        self.io = io  # coroutine runner for file reads (e.g. Offload.io); defaults to the loop's executor
+        self._queue = None
+        self._session = None
+        self._loop = None
+        self._thread = None
+        self._worker = None
+        self._flusher = None
+        self._errors = {}  # (url, key) -> {"first": ts, "count": n, "samples": [...], "message": str}
+        self.stats = {"sent": 0, "requests": 0, "files": 0, "coalesced": 0, "dropped": 0, "rate_limited": 0, "failed": 0}
+
+    def start(self):
+        if self._worker and not self._worker.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.get_ident()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._worker = asyncio.create_task(self._work())
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def _request(self, url, form_factory):
+        session = await self.session()
+        last_error = None
+        for attempt in range(self.retries + 1):
+            delay = 2 ** attempt
+            try:
+                self.stats["requests"] += 1
+                async with session.post(url, data=form_factory()) as r:
+                    text = await r.text()
+                    if r.status == 429:
+                        self.stats["rate_limited"] += 1
+                        try:
+                            delay = float(json.loads(text).get("retry_after", delay))
+                        except (ValueError, AttributeError):
+                            delay = float(r.headers.get("Retry-After", delay))
+                        last_error = WebhookError("HTTP 429")
+                    elif r.status >= 500:
+                        last_error = WebhookError(f"HTTP {r.status}")
+                    else:
+                        # Proactive pacing: wait out an exhausted bucket before the next send
+                        if r.headers.get("X-RateLimit-Remaining") == "0":
+                            await asyncio.sleep(float(r.headers.get("X-RateLimit-Reset-After", "0")))
+                        return r.status, text
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+            if attempt < self.retries:
+                await asyncio.sleep(delay)
+        raise WebhookError(str(last_error))
+
+    async def _io(self, fn, *args):
+        if self.io is not None:
+            return await self.io(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def _deliver(self, url, content=None, files=None):
+        payloads = []
+        for i, (filename, path) in enumerate(files or []):
+            payloads.append((i, filename, await self._io(_read, path)))
+
+        def form():
+            data = aiohttp.FormData()
+            data.add_field("payload_json", json.dumps({"content": content or ""}), content_type="application/json")
+            for i, filename, body in payloads:
+                data.add_field(f"files[{i}]", body, filename=filename)
+            return data
+
+        status, text = await self._request(url, form)
+        self.stats["sent"] += 1
+        self.stats["files"] += len(payloads)
+        return status, text
+
+    async def _work(self):
+        while True:
+            url, content, files, future = await self._queue.get()
+            try:
+                result = await self._deliver(url, content, files)
+                if future and not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                self.stats["failed"] += 1
+                if future and not future.done():
+                    future.set_exception(e)
+                else:
+                    print(f"[Webhook Error] {e}")
+            finally:
+                self._queue.task_done()
+
+    def post(self, url, content):
+        # Fire and forget; dropped (and counted) when the queue is full
+        if not url:
+            return
+        if self._queue is None or self._worker is None or self._worker.done():
+            if self.fallback:
+                self.fallback(url, content)
+            return
+        try:
+            self._queue.put_nowait((url, content[:MESSAGE_LIMIT], None, None))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+
+    async def send(self, url, content=None, files=None):
+        # Awaitable send; files: [(filename, path)] in a single message
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((url, (content or "")[:MESSAGE_LIMIT], files, future))
+        return await future
+
+    async def upload_files(self, url, files, content=None):
+        # Packs files into as few messages as the limits allow; returns [(status, text)]
+        results = []
+        for i, batch in enumerate(file_batches(files)):
+            results.append(await self.send(url, content if i == 0 else None, batch))
+        return results
+
+    def report(self, url, message, key=None):
+        # Thread-safe error reporting with coalescing per (url, key)
+        if self._loop is not None and self._loop.is_running() and threading.get_ident() != self._thread:
+            self._loop.call_soon_threadsafe(self._report, url, message, key)
+        else:
+            self._report(url, message, key)
+
+    def _report(self, url, message, key):
+        slot = (url, key or message)
+        entry = self._errors.get(slot)
+        if entry is None:
+            self._errors[slot] = {"first": time.monotonic(), "count": 0, "samples": [], "message": message}
+            self.post(url, message)
+            return
+        entry["count"] += 1
+        self.stats["coalesced"] += 1
+        if message not in entry["samples"] and len(entry["samples"]) < MAX_SAMPLES:
+            entry["samples"].append(message)
+
+    def _flush(self, force=False):
+        now = time.monotonic()
+        for slot, entry in list(self._errors.items()):
+            if not force and now - entry["first"] < self.window:
+                continue
+            del self._errors[slot]
+            if entry["count"]:
+                url, key = slot
+                text = f"🔁 {entry['count']}× more within {self.window:g}s: {key}"
+                samples = [s for s in entry["samples"] if s != key]
+                if samples:
+                    text += "\n" + "\n".join(f"- {s[:200]}" for s in samples)
+                self.post(url, text)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(min(self.window, 5))
+            self._flush()
+
+    async def close(self):
+        self._flush(force=True)
+        if self._queue is not None and self._worker and not self._worker.done():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+        for task in (self._worker, self._flusher):
+            if task:
+                task.cancel()
+        self._worker = self._flusher = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()